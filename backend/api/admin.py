@@ -1,12 +1,14 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import CustomUser, Class, Instructor, Student, Booking, Payment
+from .models import CustomUser, Class, Instructor, Student, Booking, Payment, ClassOccurrence, ClassDailyStats
 
 admin.site.register(Class)
 admin.site.register(Instructor)
 admin.site.register(Student)
 admin.site.register(Booking)
+admin.site.register(ClassOccurrence)
+admin.site.register(ClassDailyStats)
 
 
 @admin.register(CustomUser)
@@ -0,0 +1,110 @@
+"""
+Kolejka przyjmowania rezerwacji (w obrębie procesu).
+
+Przy otwarciu zapisów na popularne zajęcia wiele żądań naraz próbuje pisać do SQLite,
+co kończy się "database is locked". Zamiast tego wątki obsługujące żądania oddają zapis
+do jednego wątku zapisującego, który:
+
+* obsługuje zgłoszenia każdych zajęć po kolei (FIFO),
+* łączy oczekujące zgłoszenia tych samych zajęć w krótką transakcję (do batch_size),
+  każde we własnym savepoincie - błąd jednego nie wycofuje pozostałych,
+* zwraca każdemu wywołującemu jego wynik albo wyjątek.
+"""
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+
+class AdmissionTimeout(Exception):
+    """Zgłoszenie nie zostało obsłużone w wyznaczonym czasie"""
+
+
+class AdmissionQueue:
+    def __init__(self, batch_size=20):
+        self.batch_size = batch_size
+        self._pending = OrderedDict()  # klucz (np. id zajęć) -> deque[(func, future)]
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def submit(self, key, func):
+        """ Dodaje zgłoszenie do kolejki klucza i zwraca Future z wynikiem func() """
+        future = Future()
+        with self._condition:
+            self._pending.setdefault(key, deque()).append((func, future))
+            self._ensure_worker()
+            self._condition.notify()
+        return future
+
+    def run(self, key, func, timeout=None):
+        """ Wykonuje func() w wątku zapisującym i czeka na wynik """
+        future = self.submit(key, func)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            if future.cancel():
+                raise AdmissionTimeout("Booking request timed out in the admission queue.")
+            # Zgłoszenie jest już w trakcie zapisu - czekamy na jego wynik
+            return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._loop, name='booking-admission', daemon=True)
+            self._worker.start()
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            # Klucze obsługujemy na zmianę, żeby jedne zajęcia nie zagłodziły innych
+            key, queue = next(iter(self._pending.items()))
+            batch = [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+            del self._pending[key]
+            if queue:
+                self._pending[key] = queue
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = [(func, future) for func, future in self._next_batch() if future.set_running_or_notify_cancel()]
+            if batch:
+                close_old_connections()
+                self._process(batch)
+
+    def _process(self, batch):
+        results = []
+        try:
+            with transaction.atomic():
+                for func, future in batch:
+                    try:
+                        with transaction.atomic():
+                            results.append((future, func(), None))
+                    except Exception as exc:
+                        results.append((future, None, exc))
+        except Exception as exc:
+            # Nieudany commit - żadne zgłoszenie z tej partii nie zostało zapisane
+            connection.close_if_unusable_or_obsolete()
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for future, result, exc in results:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+
+booking_queue = AdmissionQueue(batch_size=getattr(settings, 'BOOKING_ADMISSION_BATCH_SIZE', 20))
+
+
+def admit_booking(class_id, func):
+    """
+    Zapis rezerwacji przez kolejkę. Wewnątrz transakcji wywołującego (np. ATOMIC_REQUESTS, testy)
+    wykonujemy func() od razu - inny wątek i tak nie widziałby jej niezatwierdzonych danych.
+    """
+    if not getattr(settings, 'BOOKING_ADMISSION_QUEUE', True) or connection.in_atomic_block:
+        return func()
+    return booking_queue.run(class_id, func, timeout=getattr(settings, 'BOOKING_ADMISSION_TIMEOUT', 10))
@@ -0,0 +1,89 @@
+"""
+Analityka zajęć liczona w jednym przebiegu po dziennych agregatach (ClassDailyStats).
+
+Okno czytamy raz (values_list().iterator()), a wszystkie rozkłady - podstawowe i wybrane
+przez wywołującego wymiary dodatkowe - zliczamy równolegle w licznikach (Counter).
+"""
+import heapq
+from collections import Counter, namedtuple
+
+from .schedule import WEEKDAY_CODES
+
+POPULAR_CLASSES_LIMIT = 5
+
+Row = namedtuple('Row', ['name', 'bookings', 'day', 'hour', 'style', 'room', 'instructor'])
+
+ROW_FIELDS = (
+    'class_model__name', 'bookings', 'day', 'hour', 'style', 'room',
+    'instructor__first_name', 'instructor__last_name',
+)
+
+# Wymiary dodatkowe: nazwa -> (klucz wiersza, nazwy pól klucza w odpowiedzi)
+EXTRA_DIMENSIONS = {
+    'weekday_hour': (lambda row: (WEEKDAY_CODES[row.day.weekday()], row.hour), ('weekday', 'hour')),
+    'room': (lambda row: (row.room,), ('room',)),
+    'instructor': (lambda row: (row.instructor,), ('instructor',)),
+}
+
+
+def _rows(queryset):
+    for name, bookings, day, hour, style, room, first_name, last_name in (
+        queryset.values_list(*ROW_FIELDS).iterator()
+    ):
+        yield Row(name, bookings, day, hour, style, room, f"{first_name} {last_name}")
+
+
+def _distribution(classes, bookings, labels):
+    # Najpierw najczęstsze, przy remisie - po kluczu (stabilna kolejność odpowiedzi)
+    keys = sorted(classes, key=lambda key: (-classes[key], tuple(str(part) for part in key)))
+    return [
+        dict(zip(labels, key), class_count=classes[key], booking_count=bookings[key])
+        for key in keys
+    ]
+
+
+def compute_analytics(queryset, dimensions=()):
+    """
+    Zwraca popular_classes, peak_hours i style_distribution dla agregatów z zapytania
+    oraz rozkład dla każdego z wymiarów dodatkowych (klucze EXTRA_DIMENSIONS).
+    """
+    # Powtórzony wymiar liczyłby każdy wiersz kilka razy w tych samych licznikach
+    dimensions = list(dict.fromkeys(dimensions))
+    unknown = set(dimensions) - set(EXTRA_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown analytics dimension(s): {', '.join(sorted(unknown))}")
+
+    popular = []
+    hours = Counter()
+    styles = Counter()
+    extra_classes = {name: Counter() for name in dimensions}
+    extra_bookings = {name: Counter() for name in dimensions}
+
+    for index, row in enumerate(_rows(queryset)):
+        # index rozstrzyga remisy tak, by heap nie porównywał samych wierszy
+        entry = (row.bookings, -index, row.name)
+        if len(popular) < POPULAR_CLASSES_LIMIT:
+            heapq.heappush(popular, entry)
+        else:
+            heapq.heappushpop(popular, entry)
+        hours[row.hour] += 1
+        styles[row.style] += 1
+        for name in dimensions:
+            key = EXTRA_DIMENSIONS[name][0](row)
+            extra_classes[name][key] += 1
+            extra_bookings[name][key] += row.bookings
+
+    result = {
+        'popular_classes': [
+            {'name': name, 'booking_count': bookings}
+            for bookings, _, name in sorted(popular, reverse=True)
+        ],
+        'peak_hours': [{'hour': hour, 'class_count': hours[hour]} for hour in sorted(hours)],
+        'style_distribution': [
+            {'style': style, 'count': count}
+            for style, count in sorted(styles.items(), key=lambda item: (-item[1], item[0]))
+        ],
+    }
+    for name in dimensions:
+        result[name] = _distribution(extra_classes[name], extra_bookings[name], EXTRA_DIMENSIONS[name][1])
+    return result
@@ -0,0 +1,38 @@
+"""
+Asynchroniczne widoki DRF.
+
+APIView jest synchroniczny - pod ASGI Django uruchamia go w jednym wspólnym wątku dla kodu
+synchronicznego, więc długie obliczenie w jednym widoku wstrzymuje pozostałe.
+AsyncAPIViewMixin zamienia dispatch() na korutynę: uwierzytelnianie, uprawnienia
+i throttling (initial()) idą przez sync_to_async, a handler (post, ...) jest korutyną
+i sam oddaje ciężką pracę do wątków (np. api.hashing).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+
+class AsyncAPIViewMixin:
+    async def dispatch(self, request, *args, **kwargs):
+        # APIView.dispatch z await na initial() i handlerze
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # OPTIONS i odrzucone metody obsługują synchroniczne metody APIView
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,92 @@
+"""
+Uwierzytelnianie JWT bez wczytywania CustomUser przy każdym żądaniu.
+
+Token zawiera claimy role i student_id (CustomTokenObtainPairSerializer.get_token), więc
+ClaimsJWTAuthentication buduje z nich leniwego użytkownika (ClaimsUser): uprawnienia
+(IsAdmin, IsStudent, ...) czytają tylko claimy, a CustomUser jest pobierany z bazy dopiero
+przy dostępie do innego pola lub użyciu obiektu jak instancji modelu.
+
+Dezaktywację i zmianę roli wykrywa stan użytkownika (is_active, role) trzymany w cache
+przez AUTH_STATE_CACHE_TTL sekund i usuwany sygnałem przy zapisie CustomUser - token
+z nieaktualnymi claimami jest odrzucany. Sygnał czyści cache procesu obsługującego zapis,
+więc przy cache lokalnym dla procesu stan żyje najwyżej AUTH_STATE_CACHE_LOCAL_TTL sekund.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .caching import timeout_for
+from .models import CustomUser
+
+
+def _state_cache():
+    return caches[settings.AUTH_STATE_CACHE_ALIAS]
+
+
+def _state_key(user_id):
+    return f'auth:user-state:{user_id}'
+
+
+def user_state(user_id):
+    """ (is_active, role) użytkownika albo None, gdy nie istnieje - z cache lub jednym zapytaniem """
+    key = _state_key(user_id)
+    state = _state_cache().get(key)
+    if state is None:
+        row = CustomUser.objects.filter(pk=user_id).values_list('is_active', 'role').first()
+        state = tuple(row) if row else ()
+        _state_cache().set(key, state, timeout=timeout_for(
+            _state_cache(), settings.AUTH_STATE_CACHE_TTL, settings.AUTH_STATE_CACHE_LOCAL_TTL
+        ))
+    return state or None
+
+
+def invalidate_user_state(user_id):
+    _state_cache().delete(_state_key(user_id))
+
+
+class ClaimsUser(SimpleLazyObject):
+    """ Użytkownik z claimów tokena; pozostałe pola wczytują CustomUser przy pierwszym dostępie """
+
+    def __init__(self, user_id, role, student_id):
+        super().__init__(lambda: CustomUser.objects.get(pk=user_id))
+        # Atrybuty w __dict__ są odczytywane bez rozwijania leniwego obiektu
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            role=role,
+            student_id=student_id,
+            is_active=True,
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    def __bool__(self):
+        # `request.user and ...` w uprawnieniach nie powinno wczytywać użytkownika
+        return True
+
+    def __str__(self):
+        return f"ClaimsUser {self.pk}"
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            # Token wydany przed dodaniem claimów - zwykłe wczytanie użytkownika
+            return super().get_user(validated_token)
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        state = user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        is_active, role = state
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if role != validated_token['role']:
+            raise AuthenticationFailed("Token role is no longer valid", code="token_role_changed")
+        return ClaimsUser(user_id, role, validated_token.get('student_id'))
@@ -0,0 +1,20 @@
+"""
+Wspólne reguły dla aliasów CACHES używanych przez api (katalog, stan użytkownika, replika).
+
+Unieważnienia przy zapisie czyszczą tylko cache, który widzi proces obsługujący zapis.
+LocMemCache jest osobny w każdym procesie, więc pozostałe procesy (workery) widzą starą
+wartość aż do wygaśnięcia wpisu - dla takiego aliasu TTL jest skracany do wartości lokalnej.
+"""
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local(cache):
+    """ True dla cache widocznego tylko w bieżącym procesie """
+    return isinstance(cache, LocMemCache)
+
+
+def timeout_for(cache, timeout, local_timeout):
+    """ TTL wpisu - w cache lokalnym dla procesu najwyżej local_timeout sekund """
+    if not is_process_local(cache):
+        return timeout
+    return local_timeout if timeout is None else min(timeout, local_timeout)
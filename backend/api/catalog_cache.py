@@ -0,0 +1,131 @@
+"""
+Pamięć podręczna odpowiedzi publicznego katalogu zajęć (/api/classes/ i /api/classes/<id>/).
+
+* szczegóły zajęć - klucz per id zajęć, usuwany przy zmianie tych zajęć,
+* listy - klucz per (filtr stylu, kursor, page_size) z numerem wersji; każda zmiana
+  zajęć podbija wersję, więc wszystkie zapisane strony list przestają obowiązywać.
+
+Unieważnianie wywołują sygnały (api/signals.py) na Class, Instructor i zmianach
+potwierdzeń w Booking. Przy kilku workerach CATALOG_CACHE_ALIAS musi wskazywać
+współdzielony cache - w lokalnym dla procesu wpisy żyją najwyżej CATALOG_CACHE_LOCAL_TIMEOUT
+sekund (api.caching). Liczniki trafień/chybień są trzymane w tym samym cache.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .caching import timeout_for
+
+LIST_VERSION_KEY = 'catalog:list-version'
+DETAIL_VERSION_KEY = 'catalog:detail-version'
+STATS_KEYS = {'hits': 'catalog:stats:hits', 'misses': 'catalog:stats:misses'}
+
+
+def _cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return timeout_for(
+        _cache(), getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300), getattr(settings, 'CATALOG_CACHE_LOCAL_TIMEOUT', 5)
+    )
+
+
+def _version(name):
+    version = _cache().get(name)
+    if version is None:
+        _cache().add(name, 1, None)
+        version = _cache().get(name, 1)
+    return version
+
+
+def _bump(name):
+    try:
+        _cache().incr(name)
+    except ValueError:
+        _cache().add(name, 2, None)
+
+
+def _record(outcome):
+    try:
+        _cache().incr(STATS_KEYS[outcome])
+    except ValueError:
+        _cache().add(STATS_KEYS[outcome], 1, None)
+
+
+def list_key(request):
+    params = request.query_params
+    raw = '|'.join([
+        request.get_host(),
+        params.get('style', ''),
+        params.get('cursor', ''),
+        params.get('page_size', ''),
+    ])
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f'catalog:list:{_version(LIST_VERSION_KEY)}:{digest}'
+
+
+def detail_key(class_id):
+    return f'catalog:class:{_version(DETAIL_VERSION_KEY)}:{class_id}'
+
+
+def cached_response(key, build):
+    """ Zwraca zapisaną odpowiedź albo buduje ją (build()) i zapisuje, jeśli to 200 OK """
+    data = _cache().get(key)
+    if data is not None:
+        _record('hits')
+        return Response(data, headers={'X-Cache': 'HIT'})
+
+    _record('misses')
+    response = build()
+    if response.status_code == 200:
+        _cache().set(key, response.data, _timeout())
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def cached_validators(key, build):
+    """ Walidatory ETag/Last-Modified zapisane obok odpowiedzi (unieważniane razem z nią) """
+    key = f'{key}:validators'
+    validators = _cache().get(key)
+    if validators is None:
+        validators = build()
+        _cache().set(key, validators, _timeout())
+    return validators
+
+
+def _invalidate_classes(class_ids):
+    _bump(LIST_VERSION_KEY)
+    version = _version(DETAIL_VERSION_KEY)
+    keys = [f'catalog:class:{version}:{class_id}' for class_id in class_ids]
+    _cache().delete_many(keys + [f'{key}:validators' for key in keys])
+
+
+def invalidate_classes(*class_ids):
+    """ Unieważnia szczegóły podanych zajęć i wszystkie listy (także po commicie transakcji) """
+    _invalidate_classes(class_ids)
+    transaction.on_commit(lambda: _invalidate_classes(class_ids))
+
+
+def invalidate_catalog():
+    """ Unieważnia cały katalog, np. po masowym przeliczeniu liczników """
+    _bump(LIST_VERSION_KEY)
+    _bump(DETAIL_VERSION_KEY)
+
+
+def stats():
+    counts = _cache().get_many(STATS_KEYS.values())
+    hits, misses = (counts.get(STATS_KEYS[outcome], 0) for outcome in ('hits', 'misses'))
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    _cache().delete_many(STATS_KEYS.values())
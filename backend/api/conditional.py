@@ -0,0 +1,59 @@
+"""
+Warunkowe GET (ETag / Last-Modified) dla widoków, których odpowiedź wynika z kilku tabel.
+
+Walidatory liczone są jednym zapytaniem agregującym (COUNT + MAX(updated_at)) - COUNT
+wykrywa usunięcia, MAX(updated_at) zmiany i nowe wiersze. Gdy klient ma aktualną wersję,
+widok zwraca 304 bez pobierania i serializacji danych.
+
+O 304 decyduje wyłącznie ETag (If-None-Match). Last-Modified ma dokładność sekundy, więc
+If-Modified-Since nie odróżniłby zmiany zapisanej później w tej samej sekundzie.
+"""
+import hashlib
+import math
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    # Pola z datą modyfikacji brane pod uwagę w walidatorach (także przez relacje, np. 'student__updated_at')
+    freshness_fields = ('updated_at',)
+
+    def get_freshness_querysets(self):
+        """ Zwraca pary (queryset, pola z datą modyfikacji) opisujące treść odpowiedzi """
+        return [(self.filter_queryset(self.get_queryset()), self.freshness_fields)]
+
+    def get_validators(self):
+        """ Zwraca (etag, last_modified jako timestamp albo None) """
+        parts = [self.request.get_full_path()]
+        last_modified = None
+        for queryset, fields in self.get_freshness_querysets():
+            aggregates = {f'last_{i}': Max(field) for i, field in enumerate(fields)}
+            row = queryset.order_by().aggregate(count=Count('pk'), **aggregates)
+            parts.append(row['count'])
+            for i in range(len(fields)):
+                value = row[f'last_{i}']
+                parts.append(value.isoformat() if value else None)
+                if value and (last_modified is None or value.timestamp() > last_modified):
+                    last_modified = value.timestamp()
+        etag = '"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+        # Zaokrąglenie w górę - nagłówek nie wskazuje chwili sprzed ostatniej zmiany
+        return etag, math.ceil(last_modified) if last_modified is not None else None
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        else:
+            response = not_modified
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Przeglądarka zawsze pyta serwer, ale może odpowiedzieć z własnej kopii po 304
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,126 @@
+"""
+Hashowanie haseł poza pętlą zdarzeń, w ograniczonej puli wątków (w obrębie procesu).
+
+PBKDF2 to setki milisekund CPU na każde logowanie i rejestrację. Przy fali zapisów
+synchroniczne widoki zajmowały tym wszystkie workery i stały pozostałe endpointy.
+Asynchroniczne widoki logowania i rejestracji oddają hashowanie do puli:
+
+* PASSWORD_HASHING_WORKERS wątków liczy hashe (hashlib zwalnia przy tym GIL),
+* do PASSWORD_HASHING_QUEUE_SIZE zgłoszeń czeka w kolejce,
+* kolejne zgłoszenie od razu dostaje HashingSaturated - widok odpowiada 503 z Retry-After.
+
+Projekt jest serwowany przez WSGI_APPLICATION - tam Django wykonuje widok asynchroniczny
+przez async_to_sync, więc wątek serwera czeka przez cały czas hashowania. Dlatego przy
+ustawionym WSGI_REQUEST_THREADS hashowanie (pula + kolejka) zajmuje najwyżej połowę wątków
+serwera, a 503 pojawia się, zanim zabraknie ich dla pozostałych endpointów. Pod ASGI
+(WSGI_REQUEST_THREADS = None) ogranicza tylko pula i kolejka.
+
+Zapytania do bazy zostają w widoku (sync_to_async) - wątki puli liczą tylko hashe.
+"""
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from .models import CustomUser
+
+
+class HashingSaturated(Exception):
+    """Pula i kolejka hashowania są pełne"""
+
+
+class HashingExecutor:
+    def __init__(self, workers=4, queue_size=16, max_in_flight=None):
+        self.workers = workers
+        self.queue_size = queue_size
+        # Najwięcej zgłoszeń naraz (liczonych i czekających) - np. limit wątków serwera WSGI
+        self.limit = workers + queue_size if max_in_flight is None else min(workers + queue_size, max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = Counter()
+
+    def submit(self, func, *args):
+        """ Zleca func(*args) puli i zwraca Future; przy pełnej kolejce zgłasza HashingSaturated """
+        with self._lock:
+            if self._in_flight >= self.limit:
+                self._stats['rejected'] += 1
+                raise HashingSaturated("Password hashing queue is full.")
+            self._in_flight += 1
+            self._stats['peak_queued'] = max(self._stats['peak_queued'], self._in_flight - self.workers)
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, func, *args):
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def _done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            self._stats['completed'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'limit': self.limit,
+                'running': min(self._in_flight, self.workers),
+                'queued': max(self._in_flight - self.workers, 0),
+                'peak_queued': self._stats['peak_queued'],
+                'completed': self._stats['completed'],
+                'rejected': self._stats['rejected'],
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _wsgi_hashing_limit():
+    threads = getattr(settings, 'WSGI_REQUEST_THREADS', None)
+    return None if threads is None else max(1, threads // 2)
+
+
+password_hashing = HashingExecutor(
+    workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 4),
+    queue_size=getattr(settings, 'PASSWORD_HASHING_QUEUE_SIZE', 16),
+    max_in_flight=_wsgi_hashing_limit(),
+)
+
+
+def _verify(password, encoded):
+    """ check_password bez zapisu - zwraca (czy poprawne, nowy hash po zmianie hashera albo None) """
+    upgraded = []
+    valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+
+async def hash_password(password):
+    return await password_hashing.run(make_password, password)
+
+
+async def authenticate(email, password):
+    """
+    Odpowiednik ModelBackend.authenticate dla widoków asynchronicznych - zwraca aktywnego
+    użytkownika (z dociągniętym studentem) albo None.
+    """
+    try:
+        user = await sync_to_async(CustomUser._default_manager.get_by_natural_key)(email)
+    except CustomUser.DoesNotExist:
+        # Jak ModelBackend: hashujemy i tak, żeby czas odpowiedzi nie zdradzał istnienia konta
+        await hash_password(password)
+        return None
+
+    valid, upgraded = await password_hashing.run(_verify, password, user.password)
+    if upgraded:
+        user.password = upgraded
+        await user.asave(update_fields=['password'])
+    if not valid or not user.is_active:
+        return None
+    return user
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api.models import Class
+from api.rollups import rebuild_class_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the daily report rollups (ClassDailyStats) from classes, bookings and attendance"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help="Only rebuild classes starting on or after this date (YYYY-MM-DD)",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Class.objects.all()
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+            queryset = queryset.filter(
+                start_time__gte=timezone.make_aware(datetime.combine(since, datetime.min.time()))
+            )
+
+        with transaction.atomic():
+            rebuilt = rebuild_class_stats(queryset)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt report rollups for {rebuilt} class(es)."))
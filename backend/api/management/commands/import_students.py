@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.student_import import StudentImportError, import_students
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports students from a CSV file (email, first_name, last_name, phone_number, date_of_birth, "
+        "optional password). Nothing is imported if any row is invalid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row")
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help="Rows inserted per bulk_create (default: STUDENT_IMPORT_CHUNK_SIZE)",
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help="Password hashing processes (default: STUDENT_IMPORT_PROCESSES or all CPUs)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as file:
+                created = import_students(file, chunk_size=options['chunk_size'], processes=options['processes'])
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+        except StudentImportError as exc:
+            lines = [f"line {error['line']}: {error['errors']}" for error in exc.errors[:20]]
+            raise CommandError("\n".join([f"Import aborted, {exc}"] + lines))
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} student(s)."))
@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads the demo data (users, students, instructors, classes, bookings, payments and school info) "
+        "and rebuilds the data derived from it. Run after 'migrate' on a fresh database."
+    )
+
+    def handle(self, *args, **options):
+        # loaddata zapisuje wiersze z pominięciem save() i sygnałów, więc terminy,
+        # liczniki miejsc i agregaty raportów odtwarzamy tymi samymi komendami co w produkcji
+        with transaction.atomic():
+            call_command('loaddata', 'demo_data', stdout=StringIO())
+            for command in ('materialize_occurrences', 'reconcile_class_counters', 'backfill_class_stats'):
+                call_command(command, stdout=StringIO())
+        self.stdout.write(self.style.SUCCESS("Loaded demo data."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Class
+from api.schedule import OCCURRENCE_HORIZON_DAYS, materialize_occurrences
+
+
+class Command(BaseCommand):
+    help = "Extends the materialized occurrences of recurring classes over a rolling horizon"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            default=OCCURRENCE_HORIZON_DAYS,
+            help=f"How many days ahead occurrences should exist (default: {OCCURRENCE_HORIZON_DAYS})",
+        )
+
+    def handle(self, *args, **options):
+        created = materialize_occurrences(Class.objects.all(), horizon_days=options['horizon_days'])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} class occurrence(s)."))
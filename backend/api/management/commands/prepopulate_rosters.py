@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.roster import prepopulate_rosters
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates default attendance rows for confirmed bookings of classes starting in the next N minutes. "
+        "Safe to run repeatedly (e.g. from cron every few minutes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes',
+            type=int,
+            default=30,
+            help="Look-ahead window in minutes (default: 30)",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        created = prepopulate_rosters(now, now + timedelta(minutes=options['minutes']), now)
+        self.stdout.write(self.style.SUCCESS(f"Created {created} attendance row(s)."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from api import catalog_cache
+from api.models import Class, ClassOccurrence
+
+
+class Command(BaseCommand):
+    help = "Rebuilds Class/ClassOccurrence confirmed_count from confirmed bookings with bulk UPDATEs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report classes whose counter differs from the bookings table",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = sum(
+                model.objects
+                .with_actual_confirmed_count()
+                .exclude(confirmed_count=F('actual_confirmed_count'))
+                .count()
+                for model in (Class, ClassOccurrence)
+            )
+            if options['dry_run']:
+                self.stdout.write(f"{drifted} counter(s) out of sync.")
+                return
+
+            updated = Class.objects.rebuild_confirmed_counts()
+            ClassOccurrence.objects.rebuild_confirmed_counts()
+        catalog_cache.invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt confirmed_count for {updated} class(es), {drifted} counter(s) were out of sync."
+        ))
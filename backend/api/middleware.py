@@ -0,0 +1,69 @@
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+
+from .models import Student
+from .replica import note_write
+
+# Brak claimu student_id albo null (force_authenticate w testach, sesja admina, token wydany przed
+# utworzeniem profilu studenta) - szukamy po użytkowniku
+_NO_CLAIM = object()
+
+
+class ReadYourWritesMiddleware:
+    """ Zapamiętuje zapis użytkownika - przez krótki czas jego odczyty omijają replikę """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            # DRF przepisuje uwierzytelnionego użytkownika (JWT) na request.user
+            note_write(getattr(request, 'user', None))
+        return response
+
+
+class CurrentStudent:
+    """
+    Student zalogowanego użytkownika, ustalany leniwie i najwyżej raz na żądanie.
+    id pochodzi z claimu student_id tokena (bez zapytania), instance to jedno zapytanie.
+    Pusty claim nie jest ostateczny - profil mógł powstać po wydaniu tokena.
+    Użytkownik jest czytany przy pierwszym dostępie - po uwierzytelnieniu w widoku DRF.
+    """
+
+    def __init__(self, request):
+        self._request = request
+
+    def _claim(self):
+        user = self._request.user
+        if not user.is_authenticated:
+            return None
+        student_id = getattr(user, 'student_id', None)
+        return _NO_CLAIM if student_id is None else student_id
+
+    @cached_property
+    def instance(self):
+        claim = self._claim()
+        if claim is None:
+            return None
+        if claim is _NO_CLAIM:
+            return Student.objects.filter(user_id=self._request.user.pk).first()
+        return Student.objects.filter(pk=claim).first()
+
+    @cached_property
+    def id(self):
+        claim = self._claim()
+        if claim is _NO_CLAIM:
+            return self.instance.pk if self.instance else None
+        return claim
+
+
+class CurrentStudentMiddleware:
+    """ Udostępnia request.current_student (CurrentStudent) """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.current_student = CurrentStudent(request)
+        return self.get_response(request)
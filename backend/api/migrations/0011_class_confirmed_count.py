@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_confirmed_count(apps, schema_editor):
+    Class = apps.get_model('api', 'Class')
+    Booking = apps.get_model('api', 'Booking')
+    confirmed = (
+        Booking.objects
+        .filter(class_model=OuterRef('pk'), status='confirmed')
+        .order_by()
+        .values('class_model')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    Class.objects.update(confirmed_count=Coalesce(Subquery(confirmed), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_attendance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='confirmed_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Liczba potwierdzonych rezerwacji (utrzymywana przez zapis rezerwacji)'),
+        ),
+        migrations.RunPython(populate_confirmed_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:51
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_class_confirmed_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('confirmed_count', models.PositiveIntegerField(default=0, editable=False, help_text='Liczba potwierdzonych rezerwacji tego terminu')),
+                ('class_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='api.class')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('class_model', 'date')},
+            },
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='occurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='api.classoccurrence'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='occurrence',
+            field=models.ForeignKey(blank=True, help_text='Termin zajęć cyklicznych (puste - rezerwacja całych zajęć)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='api.classoccurrence'),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='occurrence_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce('occurrence', models.Value(0)), output_field=models.BigIntegerField()),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='occurrence_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce('occurrence', models.Value(0)), output_field=models.BigIntegerField()),
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendance',
+            unique_together={('class_instance', 'student', 'occurrence_key')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='booking',
+            unique_together={('student', 'class_model', 'occurrence_key')},
+        ),
+    ]
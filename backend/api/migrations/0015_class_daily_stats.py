@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def populate_class_stats(apps, schema_editor):
+    Class = apps.get_model('api', 'Class')
+    ClassDailyStats = apps.get_model('api', 'ClassDailyStats')
+    classes = (
+        Class.objects
+        .filter(start_time__isnull=False)
+        .annotate(
+            booking_total=Count('bookings', distinct=True),
+            booking_confirmed=Count('bookings', filter=Q(bookings__status='confirmed'), distinct=True),
+            attendance_present=Count('attendances', filter=Q(attendances__status='present'), distinct=True),
+            attendance_late=Count('attendances', filter=Q(attendances__status='late'), distinct=True),
+            attendance_absent=Count('attendances', filter=Q(attendances__status='absent'), distinct=True),
+        )
+    )
+    rows = []
+    for class_instance in classes.iterator():
+        start = timezone.localtime(class_instance.start_time)
+        rows.append(ClassDailyStats(
+            class_model_id=class_instance.pk,
+            day=start.date(),
+            hour=start.hour,
+            instructor_id=class_instance.instructor_id,
+            style=class_instance.style,
+            room=class_instance.room,
+            max_participants=class_instance.max_participants,
+            bookings=class_instance.booking_total,
+            confirmed_bookings=class_instance.booking_confirmed,
+            present=class_instance.attendance_present,
+            late=class_instance.attendance_late,
+            absent=class_instance.attendance_absent,
+        ))
+    ClassDailyStats.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('style', models.CharField(max_length=100)),
+                ('room', models.CharField(blank=True, max_length=50, null=True)),
+                ('max_participants', models.PositiveIntegerField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('confirmed_bookings', models.PositiveIntegerField(default=0)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('class_model', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.class')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.instructor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='class_stats_day_idx')],
+            },
+        ),
+        migrations.RunPython(populate_class_stats, migrations.RunPython.noop),
+    ]
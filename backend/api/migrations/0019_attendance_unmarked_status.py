@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:10
+
+from django.db import migrations, models
+from django.db.models import F, Q
+from django.db.models.functions import Now
+
+
+def mark_prefilled_rows_unmarked(apps, schema_editor):
+    # Wpisy założone przed zajęciami (api.roster) miały status 'absent' - te, których nikt
+    # nie zmienił i których zajęcia jeszcze się nie odbyły, przestają liczyć się jako nieobecność
+    Attendance = apps.get_model('api', 'Attendance')
+    Attendance.objects.filter(
+        Q(occurrence__start_time__gt=Now()) | Q(occurrence__isnull=True, class_instance__start_time__gt=Now()),
+        status='absent', is_booked=True, updated_at=F('created_at'),
+    ).update(status='unmarked')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_payment_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='status',
+            field=models.CharField(choices=[('present', 'Obecny'), ('absent', 'Nieobecny'), ('late', 'Spóźniony'), ('unmarked', 'Nieoznaczony')], max_length=20),
+        ),
+        migrations.RunPython(mark_prefilled_rows_unmarked, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,11 @@
 from django.contrib.auth.base_user import BaseUserManager, AbstractBaseUser
 from django.contrib.auth.models import AbstractUser, PermissionsMixin
-from django.db import models
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+
+from . import catalog_cache
 
 
 # Auth
@@ -13,18 +18,26 @@ class Role(models.TextChoices):
 
 
 class CustomUserManager(BaseUserManager):
-    def create_user(self, email=None, password=None, **extra_fields):
+    def create_user(self, email=None, password=None, password_hash=None, **extra_fields):
         if not email:
             raise ValueError('The Email field must be set')
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if password_hash:
+            # Hasło zahashowane wcześniej, np. w puli api.hashing
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 
     def create_superuser(self, email, password=None, **extra_fields):
         return self.create_user(email, password, **extra_fields)
 
+    def get_by_natural_key(self, username):
+        # Logowanie od razu dociąga profil studenta - claim student_id tokena bez osobnego zapytania
+        return self.select_related('student').get(**{self.model.USERNAME_FIELD: username})
+
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
@@ -55,10 +68,108 @@ class Student(models.Model):
     phone_number = models.CharField(max_length=15)
     date_of_birth = models.DateField()  # Dodaj pole daty urodzenia
     joined_date = models.DateField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'
+
+
+class ClassFullError(Exception):
+    """Brak wolnych miejsc na zajęciach"""
+
+
+class SlotQuerySet(models.QuerySet):
+    """
+    Liczniki potwierdzonych rezerwacji zmieniane pojedynczymi warunkowymi UPDATE-ami,
+    dzięki czemu sprawdzenie limitu i zajęcie miejsca są jedną atomową operacją.
+    """
+    capacity = F('max_participants')
+    # Pola dopisywane do każdej zmiany licznika (np. updated_at dla walidatorów ETag)
+    touch = {}
+    # Pole rezerwacji wskazujące wiersz licznika i dodatkowe warunki zliczanych rezerwacji
+    booking_lookup = None
+    booking_filters = {}
+    # Lookup od zajęć do wiersza licznika - wiersz zajęć blokujemy przed zajęciem miejsca
+    class_lookup = None
+
+    def reserve_slot(self, pk):
+        """ Zajmuje jedno miejsce. Zwraca False, gdy nie ma już wolnych miejsc. """
+        with transaction.atomic():
+            # Rezerwacje całych zajęć i ich terminów dzielą miejsca w każdym terminie, więc obie
+            # ścieżki najpierw blokują wiersz zajęć (SQLite i tak zapisuje jedną transakcją naraz)
+            list(Class.objects.select_for_update(of=('self',)).filter(**{self.class_lookup: pk}).values_list('pk'))
+            return self.filter(
+                *self.capacity_conditions(), pk=pk, confirmed_count__lt=self.capacity
+            ).update(confirmed_count=F('confirmed_count') + 1, **self.touch) == 1
+
+    def capacity_conditions(self):
+        """ Dodatkowe warunki wolnego miejsca sprawdzane w UPDATE zajmującym miejsce """
+        return ()
+
+    def release_slot(self, pk):
+        """ Zwalnia jedno miejsce (np. po anulowaniu rezerwacji) """
+        return self.filter(
+            pk=pk, confirmed_count__gt=0
+        ).update(confirmed_count=F('confirmed_count') - 1, **self.touch) == 1
+
+    def with_actual_confirmed_count(self):
+        """ Dołącza rzeczywistą liczbę potwierdzonych rezerwacji (do wykrywania rozbieżności) """
+        return self.annotate(actual_confirmed_count=self.confirmed_bookings_subquery())
+
+    def rebuild_confirmed_counts(self):
+        """ Przelicza liczniki potwierdzonych rezerwacji jednym zbiorczym UPDATE-em """
+        return self.update(confirmed_count=self.confirmed_bookings_subquery(), **self.touch)
+
+    def confirmed_bookings_subquery(self):
+        bookings = Booking.objects.filter(**{self.booking_lookup: OuterRef('pk')}, **self.booking_filters)
+        return _count_confirmed(bookings)
+
+
+def _count_rows(queryset, group_by):
+    # Skorelowane COUNT(*) - grupujemy po polu, które w podzapytaniu ma jedną wartość
+    rows = queryset.order_by().values(group_by).annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(rows), 0)
+
+
+def _count_confirmed(bookings):
+    return _count_rows(bookings.filter(status='confirmed'), 'status')
+
+
+class ClassQuerySet(SlotQuerySet):
+    # Wolne miejsca są częścią katalogu, więc zmiana licznika to zmiana zajęć
+    touch = {'updated_at': Now()}
+    booking_lookup = 'class_model'
+    # Rezerwacje pojedynczych terminów liczone są w ClassOccurrence.confirmed_count
+    booking_filters = {'occurrence__isnull': True}
+    class_lookup = 'pk'
+
+    def catalog(self):
+        """
+        Zajęcia razem z instruktorem, pobrane jednym zapytaniem.
+        Liczba wolnych miejsc wynika z pola confirmed_count, więc nie wymaga zliczania rezerwacji.
+        """
+        return self.select_related('instructor')
+
+    def capacity_conditions(self):
+        # Rezerwacja całego cyklu zajmuje miejsce w każdym przyszłym terminie - żaden nie może być pełny
+        full_occurrences = ClassOccurrence.objects.filter(
+            class_model=OuterRef('pk'),
+            start_time__gte=Now(),
+            confirmed_count__gte=OuterRef('max_participants') - OuterRef('confirmed_count'),
+        )
+        return (~Exists(full_occurrences),)
+
+
+class ClassOccurrenceQuerySet(SlotQuerySet):
+    # Miejsca zajęte przez rezerwacje całego cyklu są zajęte w każdym terminie
+    capacity = F('class_model__max_participants') - F('class_model__confirmed_count')
+    booking_lookup = 'occurrence'
+    class_lookup = 'occurrences'
+
+
 class Class(models.Model):
     name = models.CharField(max_length=200)
     style = models.CharField(max_length=100, help_text="Styl tańca (np. Salsa, Waltz)")
@@ -79,13 +190,82 @@ class Class(models.Model):
     )
     is_recurring = models.BooleanField(default=False, help_text="Czy zajęcia są cykliczne")
     room = models.CharField(max_length=50, help_text="Sala zajęciowa", blank=True, null=True)
+    confirmed_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Liczba potwierdzonych rezerwacji (utrzymywana przez zapis rezerwacji)"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ClassQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Okno planu zajęć (api.schedule.classes_in_window) - obie gałęzie OR po start_time
+            models.Index(fields=['start_time'], name='class_start_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.style})"
 
+    def save(self, *args, **kwargs):
+        # confirmed_count zmieniają wyłącznie warunkowe UPDATE-y rezerwacji,
+        # więc zwykły zapis zajęć nie może nadpisać go nieaktualną wartością
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'confirmed_count'
+            ]
+        added = self.max_participants - getattr(self, '_loaded_max_participants', self.max_participants)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if added > 0:
+                promoted = _promote_waiting((Class, self.pk), added)
+                self.confirmed_count += promoted
+                if promoted + _promote_occurrence_waitlists(self.pk, added):
+                    _refresh_promoted_class(self.pk)
+        self._loaded_max_participants = self.max_participants
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Limit zapisany w bazie - po jego zwiększeniu save() przyjmuje oczekujących
+        # (pole odroczone przez only()/defer() - limit nieznany, save() nikogo nie przyjmuje)
+        if 'max_participants' in instance.__dict__:
+            instance._loaded_max_participants = instance.max_participants
+        return instance
+
     def available_slots(self):
-        booked_count = self.bookings.filter(status="confirmed").count()
-        return max(0, self.max_participants - booked_count)
+        return max(0, self.max_participants - self.confirmed_count)
+
+
+class ClassOccurrence(models.Model):
+    """
+    Pojedynczy termin zajęć cyklicznych, generowany z start_time/end_time/days_of_week
+    z wyprzedzeniem (zob. api.schedule.materialize_occurrences).
+    """
+    class_model = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='occurrences')
+    date = models.DateField()
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField(null=True, blank=True)
+    confirmed_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Liczba potwierdzonych rezerwacji tego terminu"
+    )
+
+    objects = ClassOccurrenceQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ['class_model', 'date']  # Indeks (zajęcia, data)
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.class_model} - {self.date}"
+
+    def available_slots(self):
+        class_instance = self.class_model
+        return max(0, class_instance.max_participants - class_instance.confirmed_count - self.confirmed_count)
 
 
 class Instructor(models.Model):
@@ -98,23 +278,178 @@ class Instructor(models.Model):
         return f"{self.first_name} {self.last_name} - {self.specialization}"
 
 
-class Booking(models.Model):
+class OccurrenceKeyMixin:
+    """
+    occurrence_key (COALESCE(occurrence_id, 0)) liczy baza, więc na niezapisanym obiekcie
+    nie da się go odczytać - regułę unique_together sprawdzamy na occurrence_id.
+    """
+
+    def validate_unique(self, exclude=None):
+        exclude = set(exclude or ())
+        super().validate_unique(exclude=exclude | {'occurrence_key'})
+
+        for check in self._meta.unique_together:
+            if 'occurrence_key' not in check or any(name in exclude for name in check):
+                continue
+            lookup = {
+                self._meta.get_field(name).attname: getattr(self, self._meta.get_field(name).attname)
+                for name in check if name != 'occurrence_key'
+            }
+            duplicates = type(self)._default_manager.filter(occurrence_key=self.occurrence_id or 0, **lookup)
+            if not self._state.adding:
+                duplicates = duplicates.exclude(pk=self.pk)
+            if duplicates.exists():
+                raise ValidationError({NON_FIELD_ERRORS: [self.unique_error_message(type(self), check)]})
+
+
+class BookingQuerySet(models.QuerySet):
+    def waitlist(self, slot):
+        """ Oczekujące rezerwacje miejsca slot=(model, pk), w kolejności zgłoszeń (FIFO) """
+        model, pk = slot
+        lookup = {'occurrence_id': pk} if model is ClassOccurrence else {'class_model_id': pk, 'occurrence__isnull': True}
+        return self.filter(status='waiting', **lookup).order_by('booking_date', 'id')
+
+    def promote_next(self, slot):
+        """
+        Potwierdza najstarszą oczekującą rezerwację miejsca jednym
+        UPDATE ... WHERE id = (SELECT ... LIMIT 1). Zwraca True, jeśli ktoś został przyjęty.
+        """
+        first_waiting = self.waitlist(slot).values('pk')[:1]
+        return self.filter(pk=Subquery(first_waiting), status='waiting').update(
+            status='confirmed', updated_at=Now()
+        ) == 1
+
+
+def release_or_hand_over(slot):
+    """
+    Zwalnia miejsce, a jeśli ktoś na nie czeka - przekazuje je bez zmiany licznika.
+    Miejsce zwolnione w całych zajęciach zwalnia też miejsce w każdym ich terminie.
+    """
+    if Booking.objects.promote_next(slot):
+        return
+    model, pk = slot
+    model.objects.release_slot(pk)
+    if model is Class and _promote_occurrence_waitlists(pk, 1):
+        _refresh_promoted_class(pk)
+
+
+def _promote_waiting(slot, limit):
+    """
+    Przyjmuje do `limit` oczekujących na miejsce slot=(model, pk) - każde miejsce zajmowane
+    tak jak przy rezerwacji (reserve_slot). Zwraca liczbę przyjętych.
+    """
+    model, pk = slot
+    count = 0
+    while count < limit and Booking.objects.waitlist(slot).exists():
+        if not model.objects.reserve_slot(pk):
+            break
+        if not Booking.objects.promote_next(slot):
+            model.objects.release_slot(pk)
+            break
+        count += 1
+    return count
+
+
+def _promote_occurrence_waitlists(class_id, limit):
+    """ Przyjmuje do `limit` oczekujących na każdy przyszły termin zajęć. Zwraca łączną liczbę przyjętych. """
+    occurrence_ids = list(ClassOccurrence.objects.filter(
+        class_model_id=class_id, start_time__gte=Now(), bookings__status='waiting'
+    ).values_list('pk', flat=True).distinct())
+    return sum(_promote_waiting((ClassOccurrence, pk), limit) for pk in occurrence_ids)
+
+
+def _refresh_promoted_class(class_id):
+    # promote_next to UPDATE bez sygnałów Booking - agregaty i katalog odświeżamy sami
+    from .rollups import refresh_class_stats  # rollups importuje modele
+    refresh_class_stats(class_id)
+    catalog_cache.invalidate_classes(class_id)
+
+
+class Booking(OccurrenceKeyMixin, models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE,
                                 related_name="bookings")  # Powiązanie z użytkownikiem
     class_model = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="bookings")  # Powiązanie z zajęciami
+    occurrence = models.ForeignKey(
+        ClassOccurrence,
+        on_delete=models.CASCADE,
+        related_name="bookings",
+        null=True,
+        blank=True,
+        help_text="Termin zajęć cyklicznych (puste - rezerwacja całych zajęć)"
+    )
+    occurrence_key = models.GeneratedField(
+        expression=Coalesce('occurrence', Value(0)),
+        output_field=models.BigIntegerField(),
+        db_persist=True,
+    )
     booking_date = models.DateTimeField(auto_now_add=True)  # Czas rezerwacji
     status = models.CharField(
         max_length=20,
         choices=[("confirmed", "Potwierdzona"), ("cancelled", "Anulowana"), ("waiting", "Oczekująca")],
         default="confirmed"
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookingQuerySet.as_manager()
 
     class Meta:
-        unique_together = ['student', 'class_model']  # Użytkownik może zarezerwować dane zajęcia tylko raz
+        # Użytkownik może zarezerwować dane zajęcia (lub dany termin zajęć cyklicznych) tylko raz
+        unique_together = ['student', 'class_model', 'occurrence_key']
+        indexes = [
+            # Stronicowanie rezerwacji studenta po (booking_date, id)
+            models.Index(fields=['student', 'booking_date', 'id'], name='booking_student_date_idx'),
+            # Kolejka oczekujących (FIFO) i licznik potwierdzonych danych zajęć - occurrence IS NULL
+            # sprawdzane w indeksie, bez odczytu wiersza
+            models.Index(fields=['class_model', 'status', 'occurrence', 'booking_date'], name='booking_waitlist_idx'),
+            # To samo dla terminów zajęć cyklicznych
+            models.Index(fields=['occurrence', 'status', 'booking_date'], name='booking_occurrence_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.class_model} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_confirmed_slot()
+        return instance
+
+    def _slot(self):
+        # Licznik, w którym rezerwacja zajmuje miejsce: (model, pk) albo None
+        if self.status != 'confirmed':
+            return None
+        if self.occurrence_id is not None:
+            return ClassOccurrence, self.occurrence_id
+        return Class, self.class_model_id
+
+    def _remember_confirmed_slot(self):
+        # Miejsce, które ta rezerwacja zajmuje w bazie (None - nie zajmuje)
+        self._confirmed_slot = self._slot()
+
+    def save(self, *args, **kwargs):
+        held = getattr(self, '_confirmed_slot', None)
+        wanted = self._slot()
+
+        with transaction.atomic():
+            if held != wanted:
+                if wanted is not None and not wanted[0].objects.reserve_slot(wanted[1]):
+                    raise ClassFullError("No spots available for this class.")
+                if held is not None:
+                    release_or_hand_over(held)
+            super().save(*args, **kwargs)
+
+        if held != wanted:
+            # Utrzymujemy zgodność licznika na już wczytanych obiektach zajęć/terminu
+            for field, model in ((Booking.class_model, Class), (Booking.occurrence, ClassOccurrence)):
+                if not field.is_cached(self) or getattr(self, field.field.name) is None:
+                    continue
+                related = getattr(self, field.field.name)
+                if wanted == (model, related.pk):
+                    related.confirmed_count += 1
+                elif held == (model, related.pk):
+                    related.confirmed_count = max(0, related.confirmed_count - 1)
+        self._remember_confirmed_slot()
+
 
 class Payment(models.Model):
     PAYMENT_STATUS = [
@@ -146,6 +481,17 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     paid_at = models.DateTimeField(null=True, blank=True)
     valid_until = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Stronicowanie płatności po (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='payment_created_idx'),
+            # Historia płatności studenta (PaymentListView) - zakres indeksu zamiast całej tabeli
+            models.Index(fields=['student', 'created_at', 'id'], name='payment_student_created_idx'),
+            # Filtr statusu w panelu administratora
+            models.Index(fields=['status', 'created_at', 'id'], name='payment_status_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.amount} ({self.status})"
@@ -171,13 +517,22 @@ class SchoolInfo(models.Model):
         return self.name
 
 
-class Attendance(models.Model):
+class Attendance(OccurrenceKeyMixin, models.Model):
     class_instance = models.ForeignKey('Class', on_delete=models.CASCADE, related_name='attendances')
+    occurrence = models.ForeignKey(
+        'ClassOccurrence', on_delete=models.CASCADE, related_name='attendances', null=True, blank=True
+    )  # Termin zajęć cyklicznych (puste - obecność dla całych zajęć)
+    occurrence_key = models.GeneratedField(
+        expression=Coalesce('occurrence', Value(0)),
+        output_field=models.BigIntegerField(),
+        db_persist=True,
+    )
     student = models.ForeignKey('Student', on_delete=models.CASCADE, related_name='attendances')
     status = models.CharField(max_length=20, choices=[
         ('present', 'Obecny'),
         ('absent', 'Nieobecny'),
-        ('late', 'Spóźniony')
+        ('late', 'Spóźniony'),
+        ('unmarked', 'Nieoznaczony'),  # wpis założony przed zajęciami (api.roster), nieliczony w raportach
     ])
     is_booked = models.BooleanField(default=True)  # True if student had a booking
     created_at = models.DateTimeField(auto_now_add=True)
@@ -185,4 +540,54 @@ class Attendance(models.Model):
     notes = models.TextField(blank=True, null=True)
 
     class Meta:
-        unique_together = ['class_instance', 'student']
+        unique_together = ['class_instance', 'student', 'occurrence_key']
+        indexes = [
+            # Stronicowanie listy obecności zajęć po (created_at, id)
+            models.Index(fields=['class_instance', 'created_at', 'id'], name='attendance_class_created_idx'),
+            # Liczniki obecności w agregatach (ClassDailyStatsQuerySet.refresh) - indeks pokrywający
+            models.Index(fields=['class_instance', 'status'], name='attendance_class_status_idx'),
+        ]
+
+
+class ClassDailyStatsQuerySet(models.QuerySet):
+    def refresh(self):
+        """ Przelicza miary z rezerwacji i obecności jednym zbiorczym UPDATE-em """
+        bookings = Booking.objects.filter(class_model=OuterRef('class_model'))
+        attendances = Attendance.objects.filter(class_instance=OuterRef('class_model'))
+        return self.update(
+            bookings=_count_rows(bookings, 'class_model'),
+            confirmed_bookings=_count_confirmed(bookings),
+            present=_count_rows(attendances.filter(status='present'), 'status'),
+            late=_count_rows(attendances.filter(status='late'), 'status'),
+            absent=_count_rows(attendances.filter(status='absent'), 'status'),
+        )
+
+
+class ClassDailyStats(models.Model):
+    """
+    Dzienny agregat (fakt) dla raportów: jeden wiersz na zajęcia w dniu ich rozpoczęcia,
+    z wymiarami (instruktor, styl, godzina, sala) skopiowanymi z zajęć.
+    Utrzymywany przez sygnały (api/signals.py), odbudowa: manage.py backfill_class_stats.
+    """
+    class_model = models.OneToOneField(Class, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    instructor = models.ForeignKey(Instructor, on_delete=models.CASCADE, related_name='daily_stats')
+    style = models.CharField(max_length=100)
+    room = models.CharField(max_length=50, blank=True, null=True)
+    max_participants = models.PositiveIntegerField()
+    bookings = models.PositiveIntegerField(default=0)  # wszystkie rezerwacje, niezależnie od statusu
+    confirmed_bookings = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    objects = ClassDailyStatsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day'], name='class_stats_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.class_model} - {self.day}"
@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Stronicowanie kursorem (keyset): kolejna strona to WHERE klucz > ostatni_klucz,
+    więc odległe strony kosztują tyle samo co pierwsza.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('id',)
+
+
+class CreatedAtCursorPagination(IdCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class BookingDateCursorPagination(IdCursorPagination):
+    ordering = ('-booking_date', '-id')
+
+
+class AttendanceCursorPagination(IdCursorPagination):
+    ordering = ('created_at', 'id')
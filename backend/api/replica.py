@@ -0,0 +1,100 @@
+"""
+Kierowanie odczytów list i raportów na połączenie tylko do odczytu (REPLICA_DATABASE_ALIAS).
+
+Do repliki trafiają wyłącznie zapytania wykonane wewnątrz read_from_replica() - włącza je
+ReplicaReadMixin dla GET katalogu, raportów i list płatności. Zapisy zawsze idą do default,
+a użytkownik, który zapisywał w ostatnich REPLICA_READ_YOUR_WRITES_WINDOW sekundach
+(ReadYourWritesMiddleware), czyta z default - widzi własne zmiany mimo opóźnienia repliki.
+Znacznik zapisu trzyma REPLICA_STATE_CACHE_ALIAS - przy kilku workerach i replice z opóźnieniem
+musi to być cache współdzielony, inaczej pozostałe procesy nie wiedzą o zapisie.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+def replica_alias():
+    """ Alias repliki albo None, gdy nie jest skonfigurowana lub wskazuje tę samą bazę (mirror w testach) """
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+    if not alias or alias not in settings.DATABASES:
+        return None
+    if str(connections[alias].settings_dict['NAME']) == str(connections[DEFAULT_DB_ALIAS].settings_dict['NAME']):
+        return None
+    return alias
+
+
+@contextmanager
+def read_from_replica():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary():
+    """ Pozostałe odczyty bieżącego kontekstu idą do default """
+    _replica_reads.set(False)
+
+
+def _state_cache():
+    return caches[settings.REPLICA_STATE_CACHE_ALIAS]
+
+
+def _last_write_key(user):
+    return f'replica:last-write:{user.pk}'
+
+
+def note_write(user):
+    window = settings.REPLICA_READ_YOUR_WRITES_WINDOW
+    if window and user is not None and user.is_authenticated:
+        _state_cache().set(_last_write_key(user), True, timeout=window)
+
+
+def recently_wrote(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return _state_cache().get(_last_write_key(user), False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        # zapis w trakcie żądania odczytowego - kolejne odczyty muszą go widzieć
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replika to ta sama baza - obiekty z obu połączeń mogą być ze sobą wiązane
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == getattr(settings, 'REPLICA_DATABASE_ALIAS', None):
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """ GET/HEAD widoku czyta z repliki, chyba że użytkownik właśnie zapisywał """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # użytkownik jest znany dopiero po uwierzytelnieniu
+        if recently_wrote(request.user):
+            pin_to_primary()
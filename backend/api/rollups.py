@@ -0,0 +1,59 @@
+"""
+Utrzymanie agregatów raportowych (ClassDailyStats).
+
+Wymiary wiersza (dzień, godzina, styl, sala, instruktor, limit miejsc) pochodzą z zajęć
+i są odświeżane przy ich zapisie; miary przelicza ClassDailyStatsQuerySet.refresh()
+dla zajęć, których rezerwacje lub obecności się zmieniły.
+"""
+from django.utils import timezone
+
+from .models import Class, ClassDailyStats
+
+DIMENSION_FIELDS = ['day', 'hour', 'instructor', 'style', 'room', 'max_participants']
+
+
+def _stats_row(class_instance):
+    start = timezone.localtime(class_instance.start_time)
+    return ClassDailyStats(
+        class_model=class_instance,
+        day=start.date(),
+        hour=start.hour,
+        instructor_id=class_instance.instructor_id,
+        style=class_instance.style,
+        room=class_instance.room,
+        max_participants=class_instance.max_participants,
+    )
+
+
+def sync_class_stats(class_instance):
+    """ Zapisuje wymiary agregatu po zmianie zajęć (zajęcia bez terminu nie trafiają do raportów) """
+    if class_instance.start_time is None:
+        ClassDailyStats.objects.filter(class_model=class_instance).delete()
+        return
+    row = _stats_row(class_instance)
+    _, created = ClassDailyStats.objects.update_or_create(
+        class_model=class_instance,
+        defaults={field: getattr(row, field) for field in DIMENSION_FIELDS},
+    )
+    if created:
+        ClassDailyStats.objects.filter(class_model=class_instance).refresh()
+
+
+def refresh_class_stats(*class_ids):
+    """ Przelicza miary agregatów podanych zajęć """
+    ClassDailyStats.objects.filter(class_model_id__in=class_ids).refresh()
+
+
+def rebuild_class_stats(queryset=None):
+    """ Odbudowuje agregaty zajęć z zapytania (domyślnie wszystkich). Zwraca liczbę wierszy. """
+    queryset = Class.objects.all() if queryset is None else queryset
+    ClassDailyStats.objects.filter(class_model__in=queryset.filter(start_time__isnull=True)).delete()
+    rows = [_stats_row(class_instance) for class_instance in queryset.filter(start_time__isnull=False).iterator()]
+    ClassDailyStats.objects.bulk_create(
+        rows,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['class_model'],
+        update_fields=DIMENSION_FIELDS,
+    )
+    return ClassDailyStats.objects.filter(class_model__in=queryset).refresh()
@@ -0,0 +1,88 @@
+"""
+Przygotowanie list obecności przed zajęciami: dla każdej potwierdzonej rezerwacji
+zakładamy domyślny wpis Attendance (is_booked=True), zanim prowadzący otworzy listę.
+
+Wpisy wstawiamy zbiorczo (INSERT ... SELECT ... ON CONFLICT DO NOTHING), więc
+ponowne uruchomienie nie dubluje ani nie nadpisuje już zaznaczonych obecności.
+Do czasu zaznaczenia wpis ma status 'unmarked' - agregaty raportów go nie liczą,
+a anulowanie rezerwacji usuwa go z listy (drop_unmarked_rows).
+"""
+from django.db import connection, transaction
+
+from .models import Attendance, Booking, Class, ClassOccurrence
+from .rollups import refresh_class_stats
+
+# Status wpisu, dopóki prowadzący nie zaznaczy obecności
+DEFAULT_STATUS = 'unmarked'
+
+
+def _tables():
+    return {
+        'attendance': Attendance._meta.db_table,
+        'booking': Booking._meta.db_table,
+        'class': Class._meta.db_table,
+        'occurrence': ClassOccurrence._meta.db_table,
+    }
+
+
+# Zajęcia jednorazowe: rezerwacje całych zajęć
+CLASS_ROSTER_SQL = """
+    INSERT INTO {attendance} (class_instance_id, occurrence_id, student_id, status, is_booked, notes, created_at, updated_at)
+    SELECT DISTINCT b.class_model_id, NULL, b.student_id, %s, %s, NULL, %s, %s
+    FROM {booking} b
+    JOIN {class} c ON c.id = b.class_model_id
+    WHERE b.status = 'confirmed' AND b.occurrence_id IS NULL
+      AND c.is_recurring = %s AND c.start_time >= %s AND c.start_time < %s
+    ON CONFLICT DO NOTHING
+"""
+
+# Terminy zajęć cyklicznych: rezerwacje terminu oraz rezerwacje całego cyklu
+OCCURRENCE_ROSTER_SQL = """
+    INSERT INTO {attendance} (class_instance_id, occurrence_id, student_id, status, is_booked, notes, created_at, updated_at)
+    SELECT DISTINCT o.class_model_id, o.id, b.student_id, %s, %s, NULL, %s, %s
+    FROM {occurrence} o
+    JOIN {booking} b ON b.class_model_id = o.class_model_id AND (b.occurrence_id = o.id OR b.occurrence_id IS NULL)
+    WHERE b.status = 'confirmed' AND o.start_time >= %s AND o.start_time < %s
+    ON CONFLICT DO NOTHING
+"""
+
+
+def prepopulate_rosters(window_start, window_end, now):
+    """
+    Zakłada listy obecności dla zajęć i terminów rozpoczynających się w [window_start, window_end).
+    Zwraca liczbę nowych wpisów.
+    """
+    adapt = connection.ops.adapt_datetimefield_value
+    row_values = [DEFAULT_STATUS, True, adapt(now), adapt(now)]
+    window = [adapt(window_start), adapt(window_end)]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(CLASS_ROSTER_SQL.format(**_tables()), row_values + [False] + window)
+        created = cursor.rowcount
+        cursor.execute(OCCURRENCE_ROSTER_SQL.format(**_tables()), row_values + window)
+        created += cursor.rowcount
+
+        class_ids = set(
+            Class.objects
+            .filter(is_recurring=False, start_time__gte=window_start, start_time__lt=window_end)
+            .values_list('pk', flat=True)
+        ) | set(
+            ClassOccurrence.objects
+            .filter(start_time__gte=window_start, start_time__lt=window_end)
+            .values_list('class_model_id', flat=True)
+        )
+        if created and class_ids:
+            # INSERT z pominięciem ORM nie wywołuje sygnałów
+            refresh_class_stats(*class_ids)
+    return created
+
+
+def drop_unmarked_rows(booking):
+    """ Usuwa niezaznaczone wpisy listy obecności, które założyła rezerwacja (np. po jej anulowaniu) """
+    rows = Attendance.objects.filter(
+        class_instance_id=booking.class_model_id, student_id=booking.student_id,
+        status=DEFAULT_STATUS, is_booked=True,
+    )
+    if booking.occurrence_id is not None:
+        rows = rows.filter(occurrence_id=booking.occurrence_id)
+    return rows.delete()[0]
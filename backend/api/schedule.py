@@ -0,0 +1,154 @@
+"""
+Rozwijanie zajęć cyklicznych (days_of_week, np. "MO,WE,FR") w konkretne terminy.
+
+Zajęcia cykliczne powtarzają się co tydzień w wybrane dni, od dnia start_time,
+o tej samej godzinie i z tym samym czasem trwania co pierwszy termin
+(tak jak FREQ=WEEKLY;BYDAY=... w kalendarzu na froncie).
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import ClassOccurrence
+
+WEEKDAY_CODES = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+# Na ile dni do przodu utrzymujemy wygenerowane terminy (ClassOccurrence)
+OCCURRENCE_HORIZON_DAYS = 56
+
+Occurrence = namedtuple('Occurrence', ['class_id', 'start', 'end'])
+
+
+@lru_cache(maxsize=256)
+def weekday_mask(days_of_week):
+    """ Zamienia "MO,WE,FR" na maskę bitową (bit 0 = poniedziałek, bit 6 = niedziela) """
+    mask = 0
+    for code in (days_of_week or '').upper().split(','):
+        code = code.strip()
+        if code in WEEKDAY_CODES:
+            mask |= 1 << WEEKDAY_CODES.index(code)
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def _expand(class_id, start_time, end_time, mask, date_from, date_to):
+    # class_id jest częścią klucza pamięci podręcznej: wynik dla (zajęcia, okno)
+    first = timezone.localtime(start_time)
+    duration = end_time - start_time if end_time else None
+    day = max(first.date(), date_from)
+    occurrences = []
+    while day <= date_to:
+        if mask & (1 << day.weekday()):
+            start = timezone.make_aware(datetime.combine(day, first.time().replace(tzinfo=None)))
+            occurrences.append(Occurrence(class_id, start, start + duration if duration else None))
+        day += timedelta(days=1)
+    return tuple(occurrences)
+
+
+def expand_class(class_instance, date_from, date_to):
+    """
+    Zwraca terminy zajęć w oknie [date_from, date_to] (daty włącznie).
+    Zajęcia jednorazowe mają co najwyżej jeden termin - start_time.
+    """
+    if class_instance.start_time is None:
+        return ()
+
+    mask = weekday_mask(class_instance.days_of_week) if class_instance.is_recurring else 0
+    if not mask:
+        start_date = timezone.localtime(class_instance.start_time).date()
+        if date_from <= start_date <= date_to:
+            return (Occurrence(class_instance.pk, class_instance.start_time, class_instance.end_time),)
+        return ()
+
+    return _expand(
+        class_instance.pk, class_instance.start_time, class_instance.end_time, mask, date_from, date_to
+    )
+
+
+def start_of_day(day):
+    """ Początek dnia w strefie czasowej projektu """
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def classes_in_window(queryset, date_from, date_to):
+    """ Zawęża zapytanie do zajęć, które mogą mieć termin w podanym oknie """
+    window_end = start_of_day(date_to + timedelta(days=1))
+    window_start = start_of_day(date_from)
+    return queryset.filter(
+        Q(is_recurring=True, start_time__lt=window_end)
+        | Q(start_time__gte=window_start, start_time__lt=window_end)
+    )
+
+
+def expand_schedule(queryset, date_from, date_to):
+    """ Rozwija wszystkie zajęcia z zapytania w terminy posortowane chronologicznie """
+    classes = {}
+    occurrences = []
+    for class_instance in classes_in_window(queryset, date_from, date_to):
+        classes[class_instance.pk] = class_instance
+        occurrences.extend(expand_class(class_instance, date_from, date_to))
+    occurrences.sort(key=lambda occurrence: (occurrence.start, occurrence.class_id))
+    return [(classes[occurrence.class_id], occurrence) for occurrence in occurrences]
+
+
+def _occurrence_rows(class_instance, date_from, date_to):
+    return [
+        ClassOccurrence(
+            class_model=class_instance,
+            date=timezone.localtime(occurrence.start).date(),
+            start_time=occurrence.start,
+            end_time=occurrence.end,
+        )
+        for occurrence in expand_class(class_instance, date_from, date_to)
+    ]
+
+
+def materialize_occurrences(queryset, horizon_days=OCCURRENCE_HORIZON_DAYS, today=None):
+    """
+    Przyrostowo dopisuje terminy zajęć cyklicznych do dnia today + horizon_days.
+    Dla każdych zajęć generuje tylko dni po ostatnim już zapisanym terminie.
+    Zwraca liczbę nowych terminów.
+    """
+    today = today or timezone.localdate()
+    horizon_end = today + timedelta(days=horizon_days)
+    rows = []
+    recurring = (
+        queryset
+        .filter(is_recurring=True, start_time__isnull=False)
+        .annotate(last_occurrence=Max('occurrences__date'))
+    )
+    for class_instance in recurring:
+        date_from = today
+        if class_instance.last_occurrence is not None:
+            date_from = max(today, class_instance.last_occurrence + timedelta(days=1))
+        rows.extend(_occurrence_rows(class_instance, date_from, horizon_end))
+    ClassOccurrence.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+    return len(rows)
+
+
+def sync_class_occurrences(class_instance, horizon_days=OCCURRENCE_HORIZON_DAYS, today=None):
+    """
+    Dopasowuje przyszłe terminy zajęć do ich aktualnego harmonogramu.
+    Terminy, które wypadły z harmonogramu, są usuwane tylko wtedy, gdy nie mają
+    rezerwacji ani obecności.
+    """
+    today = today or timezone.localdate()
+    horizon_end = today + timedelta(days=horizon_days)
+    expected = {}
+    if class_instance.is_recurring:
+        expected = {row.date: row for row in _occurrence_rows(class_instance, today, horizon_end)}
+
+    future = ClassOccurrence.objects.filter(class_model=class_instance, date__gte=today)
+    future.exclude(date__in=expected).filter(bookings__isnull=True, attendances__isnull=True).delete()
+
+    changed = []
+    for occurrence in future.filter(date__in=expected):
+        row = expected.pop(occurrence.date)
+        if (occurrence.start_time, occurrence.end_time) != (row.start_time, row.end_time):
+            occurrence.start_time, occurrence.end_time = row.start_time, row.end_time
+            changed.append(occurrence)
+    ClassOccurrence.objects.bulk_update(changed, ['start_time', 'end_time'])
+    ClassOccurrence.objects.bulk_create(expected.values(), ignore_conflicts=True)
@@ -0,0 +1,78 @@
+"""
+Dane szkoły (SchoolInfo) zmieniają się rzadko, a czyta je każda strona płatności
+i strona publiczna - dlatego trzymamy je w pamięci podręcznej:
+
+* warstwa lokalna procesu (z krótkim TTL, żeby inne procesy zobaczyły zmianę),
+* opcjonalna warstwa współdzielona - alias z settings.CACHES wskazany w
+  settings.SCHOOL_INFO_CACHE_ALIAS (np. Redis/Memcached).
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.forms.models import model_to_dict
+
+from .models import SchoolInfo
+
+CACHE_KEY = 'api:school-info'
+
+_lock = threading.Lock()
+_local = {'value': None, 'expires_at': 0.0}
+
+
+def _shared_cache():
+    alias = getattr(settings, 'SCHOOL_INFO_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def load_school_info():
+    """ Odczytuje dane szkoły z bazy, tworząc domyślny wpis, jeśli go nie ma """
+    school_info = SchoolInfo.objects.first()
+    if not school_info:
+        school_info = SchoolInfo.objects.create(
+            name="Szkoła Tańca",
+            address="Ulica przykładowa 1",
+            phone="000000000",
+            email="kontakt@szkola.pl",
+            bank_name="Bank",
+            bank_account="00 0000 0000 0000 0000 0000 0000",
+            bank_recipient="Szkoła Tańca",
+            transfer_title_prefix="Płatność - "
+        )
+    return school_info
+
+
+def get_school_info():
+    """ Zwraca dane szkoły z pamięci podręcznej (tylko do odczytu - nie modyfikować zwróconego obiektu) """
+    now = time.monotonic()
+    value = _local['value']
+    if value is not None and now < _local['expires_at']:
+        return value
+
+    shared = _shared_cache()
+    value = shared.get(CACHE_KEY) if shared is not None else None
+    if value is None:
+        value = load_school_info()
+        if shared is not None:
+            shared.set(CACHE_KEY, value, getattr(settings, 'SCHOOL_INFO_SHARED_TTL', None))
+
+    with _lock:
+        _local['value'] = value
+        _local['expires_at'] = now + getattr(settings, 'SCHOOL_INFO_LOCAL_TTL', 60)
+    return value
+
+
+def invalidate_school_info():
+    with _lock:
+        _local['value'] = None
+        _local['expires_at'] = 0.0
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(CACHE_KEY)
+
+
+def school_info_etag(school_info):
+    """ ETag liczony z wartości pól (SchoolInfo nie ma updated_at) """
+    return '"%s"' % hashlib.sha1(repr(sorted(model_to_dict(school_info).items())).encode()).hexdigest()
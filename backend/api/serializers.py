@@ -1,7 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from .models import Student, Class, Instructor, Booking, CustomUser, Payment, SchoolInfo, Attendance
+from .models import Student, Class, Instructor, Booking, CustomUser, Payment, SchoolInfo, Attendance, ClassOccurrence
 
 
 # Auth
@@ -10,10 +11,28 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        # Dodajemy rolę do tokena
+        # Dodajemy rolę i id studenta do tokena - api.authentication.ClaimsJWTAuthentication
+        # autoryzuje na ich podstawie bez wczytywania użytkownika
         token['role'] = user.role
+        student = getattr(user, 'student', None)
+        token['student_id'] = student.pk if student else None
         return token
 
+    @staticmethod
+    def profile_data(user):
+        return {
+            "email": user.email,
+            "firstName": user.first_name,
+            "lastName": user.last_name,
+            "role": user.role,
+        }
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # Dane profilu z użytkownika uwierzytelnionego w super().validate - bez ponownego zapytania
+        data.update(self.profile_data(self.user))
+        return data
+
 
 class RegisterUserSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(required=True)  # Dane studenta
@@ -33,21 +52,33 @@ class RegisterUserSerializer(serializers.ModelSerializer):
         phone_number = validated_data.pop('phone_number')
         date_of_birth = validated_data.pop('date_of_birth')
 
-        # Tworzymy użytkownika
-        user = CustomUser.objects.create_user(role='student', **validated_data)
-
-        # Tworzymy studenta i wiążemy go z użytkownikiem
-        Student.objects.create(
-            user=user,
-            first_name=first_name,
-            last_name=last_name,
-            email=user.email,  # Student ma ten sam email co użytkownik
-            phone_number=phone_number,
-            date_of_birth=date_of_birth
-        )
+        # Użytkownik i student w jednej transakcji - błąd przy studencie nie zostawia konta bez profilu
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(role='student', **validated_data)
+
+            # Tworzymy studenta i wiążemy go z użytkownikiem
+            Student.objects.create(
+                user=user,
+                first_name=first_name,
+                last_name=last_name,
+                email=user.email,  # Student ma ten sam email co użytkownik
+                phone_number=phone_number,
+                date_of_birth=date_of_birth
+            )
         return user
 
 
+class StudentImportRowSerializer(serializers.Serializer):
+    """ Wiersz CSV importu studentów (api.student_import) - walidacja pól bez zapytań do bazy """
+    email = serializers.EmailField(max_length=254)
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    phone_number = serializers.CharField(max_length=15)
+    date_of_birth = serializers.DateField()
+    # Bez hasła konto dostaje hasło nieużywalne - student ustawia własne przy resecie
+    password = serializers.CharField(required=False, allow_blank=True, write_only=True)
+
+
 class StudentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Student
@@ -135,8 +166,32 @@ class ClassDetailSerializer(serializers.ModelSerializer):
         return f"{obj.instructor.first_name} {obj.instructor.last_name}"
 
     def get_available_slots(self, obj):
-        booked_count = obj.bookings.filter(status="confirmed").count()
-        return obj.max_participants - booked_count
+        return obj.max_participants - obj.confirmed_count
+
+
+class ClassOccurrenceSerializer(serializers.ModelSerializer):
+    start_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M")
+    end_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M")
+    available_slots = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ClassOccurrence
+        fields = ['id', 'class_model', 'date', 'start_time', 'end_time', 'available_slots']
+
+    def get_available_slots(self, obj):
+        return obj.available_slots()
+
+
+class ScheduleOccurrenceSerializer(serializers.Serializer):
+    class_id = serializers.IntegerField()
+    occurrence_id = serializers.IntegerField(allow_null=True)
+    name = serializers.CharField()
+    style = serializers.CharField()
+    instructor = serializers.CharField()
+    room = serializers.CharField(allow_null=True)
+    start = serializers.DateTimeField(format="%Y-%m-%d %H:%M")
+    end = serializers.DateTimeField(format="%Y-%m-%d %H:%M", allow_null=True)
+    available_slots = serializers.IntegerField()
 
 
 class ClassUpdateSerializer(serializers.ModelSerializer):
@@ -183,13 +238,22 @@ class BookingSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Booking
-        fields = ['id', 'student', 'class_model', 'class_details', 'booking_date', 'status']
+        fields = ['id', 'student', 'class_model', 'occurrence', 'class_details', 'booking_date', 'status']
         read_only_fields = ['student', 'booking_date']
 
     def validate(self, data):
+        # Przy braku miejsc (wg licznika) rezerwacja trafia na listę oczekujących;
+        # ostateczną decyzję podejmuje warunkowy UPDATE przy zapisie
         class_instance = data['class_model']
-        if class_instance.bookings.filter(status="confirmed").count() >= class_instance.max_participants:
-            raise serializers.ValidationError("No spots available for this class.")
+        occurrence = data.get('occurrence')
+        if occurrence is not None:
+            if occurrence.class_model_id != class_instance.id:
+                raise serializers.ValidationError("Occurrence does not belong to this class.")
+            full = occurrence.available_slots() <= 0
+        else:
+            full = class_instance.confirmed_count >= class_instance.max_participants
+        if full and data.get('status', 'confirmed') == 'confirmed':
+            data['status'] = 'waiting'
         return data
 
 # Reports
@@ -206,6 +270,10 @@ class ClassAnalyticsSerializer(serializers.Serializer):
     popular_classes = serializers.ListField(child=serializers.DictField())
     peak_hours = serializers.ListField(child=serializers.DictField())
     style_distribution = serializers.ListField(child=serializers.DictField())
+    # Wymiary dodatkowe (?dimensions=weekday_hour,room,instructor)
+    weekday_hour = serializers.ListField(child=serializers.DictField(), required=False)
+    room = serializers.ListField(child=serializers.DictField(), required=False)
+    instructor = serializers.ListField(child=serializers.DictField(), required=False)
 
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -225,12 +293,110 @@ class AttendanceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Attendance
-        fields = ['id', 'student', 'student_name', 'status', 'is_booked',
+        fields = ['id', 'student', 'occurrence', 'student_name', 'status', 'is_booked',
                  'booking_status', 'notes', 'created_at']
 
+    def validate_occurrence(self, occurrence):
+        class_id = self.context['view'].kwargs.get('class_id') if 'view' in self.context else None
+        if occurrence is not None and class_id is not None and occurrence.class_model_id != int(class_id):
+            raise serializers.ValidationError("Occurrence does not belong to this class.")
+        return occurrence
+
+    @staticmethod
+    def booking_statuses(class_id, attendances):
+        """
+        Statusy rezerwacji studentów z listy obecności, pobrane jednym zapytaniem.
+        Klucz: (student_id, occurrence_key) - do przekazania w context['booking_statuses'].
+        """
+        student_ids = {attendance.student_id for attendance in attendances}
+        rows = Booking.objects.filter(
+            class_model_id=class_id, student_id__in=student_ids
+        ).values_list('student_id', 'occurrence_key', 'status')
+        return {(student_id, occurrence_key): status for student_id, occurrence_key, status in rows}
+
     def get_booking_status(self, obj):
+        statuses = self.context.get('booking_statuses')
+        if statuses is not None:
+            return statuses.get((obj.student_id, obj.occurrence_id or 0), statuses.get((obj.student_id, 0)))
+
+        # Rezerwacja danego terminu, a w jej braku rezerwacja całych zajęć
         booking = Booking.objects.filter(
             student=obj.student,
-            class_model=obj.class_instance
-        ).first()
-        return booking.status if booking else None
\ No newline at end of file
+            class_model=obj.class_instance,
+            occurrence_key__in=[obj.occurrence_id or 0, 0]
+        ).order_by('-occurrence_key').first()
+        return booking.status if booking else None
+
+class AttendanceBulkItemSerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Attendance._meta.get_field('status').choices)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class AttendanceBulkSerializer(serializers.Serializer):
+    """
+    Obecność całej listy naraz: {"occurrence": <id|null>, "records": [{"student", "status", "notes"?}]}.
+    Zapis jednym INSERT ... ON CONFLICT DO UPDATE w jednej transakcji.
+    """
+    occurrence = serializers.PrimaryKeyRelatedField(
+        queryset=ClassOccurrence.objects.all(), required=False, allow_null=True
+    )
+    records = AttendanceBulkItemSerializer(many=True, allow_empty=False)
+
+    def validate_occurrence(self, occurrence):
+        class_instance = self.context['class_instance']
+        if occurrence is not None and occurrence.class_model_id != class_instance.pk:
+            raise serializers.ValidationError("Occurrence does not belong to this class.")
+        return occurrence
+
+    def validate_records(self, records):
+        student_ids = [record['student'] for record in records]
+        if len(set(student_ids)) != len(student_ids):
+            raise serializers.ValidationError("Each student may appear only once.")
+        missing = set(student_ids) - set(Student.objects.filter(pk__in=student_ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(f"Unknown student(s): {', '.join(map(str, sorted(missing)))}.")
+        return records
+
+    def create(self, validated_data):
+        class_instance = self.context['class_instance']
+        occurrence = validated_data.get('occurrence')
+        records = validated_data['records']
+        statuses = AttendanceSerializer.booking_statuses(
+            class_instance.pk, [Attendance(student_id=record['student']) for record in records]
+        )
+
+        def is_booked(student_id):
+            status = statuses.get((student_id, occurrence.pk if occurrence else 0), statuses.get((student_id, 0)))
+            return status == 'confirmed'
+
+        rows = {True: [], False: []}
+        for record in records:
+            rows['notes' in record].append(Attendance(
+                class_instance=class_instance,
+                occurrence=occurrence,
+                student_id=record['student'],
+                status=record['status'],
+                notes=record.get('notes'),
+                is_booked=is_booked(record['student']),
+            ))
+
+        # Notatki nadpisujemy tylko wtedy, gdy zostały przesłane
+        for with_notes, batch in rows.items():
+            if batch:
+                Attendance.objects.bulk_create(
+                    batch,
+                    update_conflicts=True,
+                    unique_fields=['class_instance', 'student', 'occurrence_key'],
+                    update_fields=['status', 'is_booked', 'updated_at'] + (['notes'] if with_notes else []),
+                )
+        return (
+            Attendance.objects
+            .filter(
+                class_instance=class_instance,
+                occurrence_key=occurrence.pk if occurrence else 0,
+                student_id__in=[record['student'] for record in records],
+            )
+            .select_related('student')
+            .order_by('created_at', 'id')
+        )
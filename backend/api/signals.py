@@ -0,0 +1,116 @@
+from django.db import transaction
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import catalog_cache
+from .authentication import invalidate_user_state
+from .models import Attendance, Booking, Class, CustomUser, Instructor, SchoolInfo, release_or_hand_over
+from .rollups import refresh_class_stats, sync_class_stats
+from .roster import drop_unmarked_rows
+from .schedule import sync_class_occurrences
+from .school_info import invalidate_school_info
+
+
+@receiver(post_delete, sender=Booking)
+def release_slot_of_deleted_booking(sender, instance, **kwargs):
+    # Usunięcie potwierdzonej rezerwacji (także kaskadowe, np. razem ze studentem) zwalnia miejsce
+    # albo przekazuje je pierwszej osobie z listy oczekujących
+    held = getattr(instance, '_confirmed_slot', None)
+    if held is not None:
+        release_or_hand_over(held)
+
+
+@receiver(post_save, sender=Class)
+def refresh_class_occurrences(sender, instance, raw=False, **kwargs):
+    # Po zmianie harmonogramu zajęć odświeżamy przyszłe terminy
+    if not raw:
+        sync_class_occurrences(instance)
+
+
+@receiver(post_save, sender=SchoolInfo)
+@receiver(post_delete, sender=SchoolInfo)
+def invalidate_cached_school_info(sender, **kwargs):
+    # Czyścimy od razu i jeszcze raz po commicie, żeby równoległy odczyt nie zapisał starej wersji
+    invalidate_school_info()
+    transaction.on_commit(invalidate_school_info)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user_state(sender, instance, **kwargs):
+    # Dezaktywacja lub zmiana roli - tokeny z nieaktualnymi claimami odrzucamy od razu, nie po TTL
+    invalidate_user_state(instance.pk)
+    transaction.on_commit(lambda: invalidate_user_state(instance.pk))
+
+
+@receiver(post_save, sender=Class)
+@receiver(post_delete, sender=Class)
+def invalidate_cached_class(sender, instance, **kwargs):
+    catalog_cache.invalidate_classes(instance.pk)
+
+
+@receiver(post_save, sender=Instructor)
+def invalidate_cached_instructor_classes(sender, instance, **kwargs):
+    # Katalog pokazuje imię i nazwisko prowadzącego (usunięcie kasuje zajęcia - obsługuje to sygnał Class)
+    class_ids = list(instance.classes.values_list('pk', flat=True))
+    if class_ids:
+        Class.objects.filter(pk__in=class_ids).update(updated_at=Now())
+        catalog_cache.invalidate_classes(*class_ids)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_slot(sender, instance, **kwargs):
+    instance._slot_before_save = getattr(instance, '_confirmed_slot', None)
+
+
+def _invalidate_booked_classes(*slots):
+    # Katalog pokazuje wolne miejsca całych zajęć - liczniki terminów go nie dotyczą
+    class_ids = {slot[1] for slot in slots if slot is not None and slot[0] is Class}
+    if class_ids:
+        catalog_cache.invalidate_classes(*class_ids)
+
+
+@receiver(post_save, sender=Booking)
+def invalidate_cached_class_on_booking_change(sender, instance, **kwargs):
+    before, after = getattr(instance, '_slot_before_save', None), instance._slot()
+    if before != after:
+        _invalidate_booked_classes(before, after)
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_cached_class_on_booking_delete(sender, instance, **kwargs):
+    _invalidate_booked_classes(getattr(instance, '_confirmed_slot', None))
+
+
+@receiver(post_save, sender=Booking)
+def drop_roster_rows_of_cancelled_booking(sender, instance, raw=False, **kwargs):
+    # Rezerwacja przestała być potwierdzona - niezaznaczony wpis listy obecności nie jest już aktualny
+    if not raw and getattr(instance, '_slot_before_save', None) is not None and instance._slot() is None:
+        drop_unmarked_rows(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def drop_roster_rows_of_deleted_booking(sender, instance, **kwargs):
+    if getattr(instance, '_confirmed_slot', None) is not None:
+        drop_unmarked_rows(instance)
+
+
+@receiver(post_save, sender=Class)
+def refresh_class_stats_dimensions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_class_stats(instance)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def refresh_class_stats_of_booking(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_class_stats(instance.class_model_id)
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_class_stats_of_attendance(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_class_stats(instance.class_instance_id)
@@ -0,0 +1,127 @@
+"""
+Zbiorczy import studentów z CSV (lista uczniów szkoły partnerskiej).
+
+Kolumny: email, first_name, last_name, phone_number, date_of_birth (YYYY-MM-DD) i opcjonalnie
+password. Import jest "wszystko albo nic":
+
+* najpierw walidujemy wszystkie wiersze - pola serializerem, a unikalność emaili
+  względem zbioru w pamięci (jedno zapytanie o istniejące emaile zamiast jednego na wiersz),
+* hasła hashujemy w puli procesów (PBKDF2 to czysty CPU) - jeszcze przed transakcją,
+  żeby nie trzymać blokady zapisu SQLite na czas hashowania,
+* użytkowników i studentów wstawiamy bulk_create porcjami po chunk_size w jednej transakcji.
+"""
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from .models import CustomUser, Student
+from .serializers import StudentImportRowSerializer
+
+COLUMNS = ('email', 'first_name', 'last_name', 'phone_number', 'date_of_birth', 'password')
+REQUIRED_COLUMNS = COLUMNS[:-1]
+
+
+class StudentImportError(Exception):
+    """Plik nie przeszedł walidacji - nic nie zostało zaimportowane"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid row(s).")
+        # Lista {'line': numer linii w pliku albo None, 'errors': {pole: [komunikaty]}}
+        self.errors = errors
+
+
+def validate_rows(lines):
+    """ Waliduje wiersze CSV (iterowalne linie tekstu) i zwraca listę poprawnych danych """
+    reader = csv.DictReader(lines)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise StudentImportError([
+            {'line': 1, 'errors': {column: ["Missing column."] for column in missing}}
+        ])
+
+    taken = {email.lower() for email in CustomUser.objects.values_list('email', flat=True).iterator()}
+    taken.update(email.lower() for email in Student.objects.values_list('email', flat=True).iterator())
+
+    rows, errors = [], []
+    for row in reader:
+        serializer = StudentImportRowSerializer(data={column: row.get(column) or '' for column in COLUMNS})
+        if not serializer.is_valid():
+            errors.append({'line': reader.line_num, 'errors': serializer.errors})
+            continue
+        data = serializer.validated_data
+        data['email'] = CustomUser.objects.normalize_email(data['email'])
+        if data['email'].lower() in taken:
+            errors.append({'line': reader.line_num, 'errors': {'email': ["Email is already in use."]}})
+            continue
+        taken.add(data['email'].lower())
+        rows.append(data)
+
+    if errors:
+        raise StudentImportError(errors)
+    return rows
+
+
+def _worker_context():
+    # Nie forkujemy procesu z działającymi wątkami (kolejka przyjęć, pula hashowania) - blokady
+    # trzymane przez te wątki zostałyby w procesie potomnym zablokowane na zawsze. Nowy proces
+    # importuje tylko make_password, a ustawienia wczytuje z odziedziczonego DJANGO_SETTINGS_MODULE.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def hash_passwords(passwords, processes=None):
+    """
+    make_password dla każdego hasła, w puli procesów gdy jest co hashować.
+    Puste hasło daje hasło nieużywalne (bez kosztu hashowania).
+    """
+    hashes = [make_password(None) for _ in passwords]
+    pending = [(i, password) for i, password in enumerate(passwords) if password]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(pending) < 2:
+        results = [make_password(password) for _, password in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=_worker_context()) as pool:
+            chunksize = max(1, len(pending) // (processes * 4))
+            results = list(pool.map(make_password, [password for _, password in pending], chunksize=chunksize))
+    for (i, _), encoded in zip(pending, results):
+        hashes[i] = encoded
+    return hashes
+
+
+def import_students(lines, chunk_size=None, processes=None):
+    """ Importuje studentów z CSV; zwraca liczbę utworzonych albo zgłasza StudentImportError """
+    chunk_size = chunk_size or settings.STUDENT_IMPORT_CHUNK_SIZE
+    rows = validate_rows(lines)
+    hashes = hash_passwords(
+        [row.get('password') for row in rows],
+        processes=processes or settings.STUDENT_IMPORT_PROCESSES,
+    )
+
+    try:
+        with transaction.atomic():
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                users = CustomUser.objects.bulk_create([
+                    CustomUser(email=row['email'], password=encoded, role='student')
+                    for row, encoded in zip(chunk, hashes[start:start + chunk_size])
+                ])
+                Student.objects.bulk_create([
+                    Student(
+                        user=user,
+                        first_name=row['first_name'],
+                        last_name=row['last_name'],
+                        email=user.email,
+                        phone_number=row['phone_number'],
+                        date_of_birth=row['date_of_birth'],
+                    )
+                    for user, row in zip(users, chunk)
+                ])
+    except IntegrityError:
+        # Email zajęty w międzyczasie (np. równoległa rejestracja) - transakcja wycofana
+        raise StudentImportError([{'line': None, 'errors': {'email': ["Email is already in use."]}}])
+    return len(rows)
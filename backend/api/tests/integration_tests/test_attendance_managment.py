@@ -69,7 +69,7 @@ class AttendanceManagementTest(TestCase):
         # 2. Get attendance list for class
         response = self.client.get(f'/api/classes/{self.dance_class.id}/attendance/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
         # 3. Update attendance status
         update_data = {'status': 'late'}
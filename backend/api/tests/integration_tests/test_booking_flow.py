@@ -47,10 +47,10 @@ class BookingFlowTest(TestCase):
         # 1. Get available classes
         response = self.client.get('/api/classes/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
         # 2. Get class details
-        class_id = response.data[0]['id']
+        class_id = response.data['results'][0]['id']
         response = self.client.get(f'/api/classes/{class_id}/')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['name'], 'Test Class')
@@ -66,8 +66,8 @@ class BookingFlowTest(TestCase):
         # 4. Verify booking exists
         response = self.client.get('/api/bookings/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['id'], booking_id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], booking_id)
 
         # 5. Cancel booking
         response = self.client.delete(f'/api/bookings/{booking_id}/delete/')
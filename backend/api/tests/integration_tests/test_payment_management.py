@@ -43,10 +43,10 @@ class PaymentManagementTest(TestCase):
         # 2. Get payment list
         response = self.client.get('/api/payments/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
         # 3. Get payment details
-        payment_id = response.data[0]['id']
+        payment_id = response.data['results'][0]['id']
         response = self.client.get(f'/api/payments/{payment_id}/')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['amount'], '150.00')
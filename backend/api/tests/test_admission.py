@@ -0,0 +1,70 @@
+import threading
+from datetime import timedelta
+
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from ..admission import AdmissionQueue
+from ..models import CustomUser, Student, Class, Instructor, Booking, ClassFullError
+
+
+class AdmissionQueueTests(TransactionTestCase):
+    def setUp(self):
+        instructor = Instructor.objects.create(
+            first_name='Jane',
+            last_name='Smith',
+            email='jane@example.com',
+            specialization='Salsa'
+        )
+        self.dance_class = Class.objects.create(
+            name='Popular Class',
+            style='Salsa',
+            max_participants=5,
+            instructor=instructor,
+            start_time=timezone.now() + timedelta(days=1)
+        )
+        self.students = [
+            Student.objects.create(
+                user=CustomUser.objects.create_user(email=f'rush{i}@example.com', password='pass123'),
+                first_name='Rush',
+                last_name=f'Student {i}',
+                email=f'rush{i}@example.com',
+                phone_number='123456789',
+                date_of_birth='2000-01-01'
+            )
+            for i in range(12)
+        ]
+        self.queue = AdmissionQueue(batch_size=4)
+
+    def book(self, student):
+        try:
+            return Booking.objects.create(student=student, class_model=self.dance_class, status='confirmed').status
+        except ClassFullError:
+            return Booking.objects.create(student=student, class_model=self.dance_class, status='waiting').status
+
+    def test_rush_is_serialized_without_overbooking(self):
+        results = []
+
+        def request(student):
+            results.append(self.queue.run(self.dance_class.pk, lambda: self.book(student), timeout=10))
+
+        threads = [threading.Thread(target=request, args=(student,)) for student in self.students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), ['confirmed'] * 5 + ['waiting'] * 7)
+        self.dance_class.refresh_from_db()
+        self.assertEqual(self.dance_class.confirmed_count, 5)
+
+    def test_failed_request_does_not_roll_back_batch(self):
+        def failing():
+            raise ValueError("boom")
+
+        failed = self.queue.submit(self.dance_class.pk, failing)
+        booked = self.queue.submit(self.dance_class.pk, lambda: self.book(self.students[0]))
+        with self.assertRaises(ValueError):
+            failed.result(timeout=10)
+        self.assertEqual(booked.result(timeout=10), 'confirmed')
+        self.assertTrue(Booking.objects.filter(student=self.students[0]).exists())
@@ -0,0 +1,267 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.hashers import check_password
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from api.models import CustomUser, Student, Class, Instructor, Booking, Attendance, ClassDailyStats, \
+    ClassOccurrence, Payment, SchoolInfo
+from api.student_import import hash_passwords
+
+
+class ReconcileClassCountersTests(TestCase):
+    def setUp(self):
+        self.instructor = Instructor.objects.create(
+            first_name='Jane',
+            last_name='Smith',
+            email='jane@example.com',
+            specialization='Salsa'
+        )
+        self.dance_class = Class.objects.create(
+            name='Salsa Beginners',
+            style='Salsa',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1)
+        )
+        user = CustomUser.objects.create_user(email='student@example.com', password='testpass123')
+        self.student = Student.objects.create(
+            user=user,
+            first_name='John',
+            last_name='Doe',
+            email='student@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        Booking.objects.create(student=self.student, class_model=self.dance_class, status='confirmed')
+        # Symulujemy rozjazd licznika (np. po imporcie z pominięciem modelu)
+        Class.objects.filter(pk=self.dance_class.pk).update(confirmed_count=7)
+
+    def test_dry_run_reports_drift_without_changes(self):
+        out = StringIO()
+        call_command('reconcile_class_counters', '--dry-run', stdout=out)
+        self.assertIn('1 counter(s) out of sync', out.getvalue())
+        self.dance_class.refresh_from_db()
+        self.assertEqual(self.dance_class.confirmed_count, 7)
+
+    def test_rebuilds_counters(self):
+        call_command('reconcile_class_counters', stdout=StringIO())
+        self.dance_class.refresh_from_db()
+        self.assertEqual(self.dance_class.confirmed_count, 1)
+
+
+class BackfillClassStatsTests(TestCase):
+    def setUp(self):
+        instructor = Instructor.objects.create(
+            first_name='Jane',
+            last_name='Smith',
+            email='jane@example.com',
+            specialization='Salsa'
+        )
+        self.dance_class = Class.objects.create(
+            name='Salsa Beginners',
+            style='Salsa',
+            max_participants=10,
+            instructor=instructor,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1)
+        )
+        user = CustomUser.objects.create_user(email='student@example.com', password='testpass123')
+        student = Student.objects.create(
+            user=user,
+            first_name='John',
+            last_name='Doe',
+            email='student@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        Booking.objects.create(student=student, class_model=self.dance_class, status='confirmed')
+        Attendance.objects.create(class_instance=self.dance_class, student=student, status='late')
+        # Historia sprzed wprowadzenia agregatów
+        ClassDailyStats.objects.all().delete()
+
+    def test_backfills_rollups(self):
+        out = StringIO()
+        call_command('backfill_class_stats', stdout=out)
+        self.assertIn('1 class(es)', out.getvalue())
+        stats = ClassDailyStats.objects.get(class_model=self.dance_class)
+        self.assertEqual((stats.bookings, stats.confirmed_bookings, stats.late), (1, 1, 1))
+        self.assertEqual(stats.day, timezone.localdate(self.dance_class.start_time))
+
+    def test_backfill_since_skips_older_classes(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        call_command('backfill_class_stats', '--since', tomorrow.isoformat(), stdout=StringIO())
+        self.assertFalse(ClassDailyStats.objects.exists())
+
+
+class PrepopulateRostersTests(TestCase):
+    def setUp(self):
+        self.instructor = Instructor.objects.create(
+            first_name='Jane',
+            last_name='Smith',
+            email='jane@example.com',
+            specialization='Salsa'
+        )
+        self.students = []
+        for i in range(3):
+            user = CustomUser.objects.create_user(email=f'student{i}@example.com', password='testpass123')
+            self.students.append(Student.objects.create(
+                user=user,
+                first_name='John',
+                last_name=f'Doe {i}',
+                email=f'student{i}@example.com',
+                phone_number='123456789',
+                date_of_birth='2000-01-01'
+            ))
+        start = timezone.now() + timedelta(minutes=10)
+        self.dance_class = Class.objects.create(
+            name='Salsa Beginners',
+            style='Salsa',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=start,
+            end_time=start + timedelta(hours=1)
+        )
+        Booking.objects.create(student=self.students[0], class_model=self.dance_class, status='confirmed')
+        Booking.objects.create(student=self.students[1], class_model=self.dance_class, status='confirmed')
+        Booking.objects.create(student=self.students[2], class_model=self.dance_class, status='cancelled')
+
+    def test_creates_roster_once(self):
+        Attendance.objects.create(class_instance=self.dance_class, student=self.students[0], status='present')
+
+        out = StringIO()
+        call_command('prepopulate_rosters', '--minutes', '30', stdout=out)
+        self.assertIn('Created 1 attendance row(s)', out.getvalue())
+        call_command('prepopulate_rosters', '--minutes', '30', stdout=StringIO())
+
+        roster = dict(
+            Attendance.objects.filter(class_instance=self.dance_class).values_list('student_id', 'status')
+        )
+        self.assertEqual(roster, {self.students[0].id: 'present', self.students[1].id: 'unmarked'})
+        self.assertTrue(Attendance.objects.get(student=self.students[1]).is_booked)
+        # Niezaznaczony wpis nie jest nieobecnością w raportach
+        stats = ClassDailyStats.objects.get(class_model=self.dance_class)
+        self.assertEqual((stats.present, stats.absent), (1, 0))
+
+    def test_cancelled_booking_drops_unmarked_row(self):
+        call_command('prepopulate_rosters', '--minutes', '30', stdout=StringIO())
+        Attendance.objects.filter(student=self.students[0]).update(status='present')
+
+        for booking in Booking.objects.filter(student__in=self.students[:2]):
+            booking.status = 'cancelled'
+            booking.save()
+        self.assertEqual(
+            list(Attendance.objects.values_list('student_id', 'status')), [(self.students[0].id, 'present')]
+        )
+
+    def test_skips_classes_outside_window(self):
+        call_command('prepopulate_rosters', '--minutes', '5', stdout=StringIO())
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_creates_roster_for_occurrence(self):
+        start = timezone.now() - timedelta(days=7)
+        weekly = Class.objects.create(
+            name='Weekly Tango',
+            style='Tango',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=start,
+            is_recurring=True,
+            days_of_week='MO'
+        )
+        occurrence = ClassOccurrence.objects.create(
+            class_model=weekly, date=timezone.localdate() + timedelta(days=60),
+            start_time=timezone.now() + timedelta(minutes=15)
+        )
+        Booking.objects.create(student=self.students[0], class_model=weekly, status='confirmed')
+        Booking.objects.create(
+            student=self.students[1], class_model=weekly, occurrence=occurrence, status='confirmed'
+        )
+
+        call_command('prepopulate_rosters', stdout=StringIO())
+        self.assertEqual(
+            set(Attendance.objects.filter(occurrence=occurrence).values_list('student_id', flat=True)),
+            {self.students[0].id, self.students[1].id}
+        )
+
+
+class LoadDemoDataTests(TestCase):
+    def test_loads_demo_data_with_derived_rows(self):
+        out = StringIO()
+        call_command('load_demo_data', stdout=out)
+        self.assertIn('Loaded demo data', out.getvalue())
+        self.assertEqual(CustomUser.objects.count(), 8)
+        self.assertEqual(Student.objects.count(), 5)
+        self.assertEqual(Instructor.objects.count(), 2)
+        self.assertEqual(Class.objects.count(), 4)
+        self.assertEqual(Booking.objects.count(), 4)
+        self.assertEqual(Payment.objects.count(), 4)
+        self.assertTrue(SchoolInfo.objects.get().bank_account)
+
+        recurring = Class.objects.get(name='Zajęcia cykliczne')
+        self.assertEqual(recurring.confirmed_count, 1)
+        self.assertEqual(ClassDailyStats.objects.get(class_model=recurring).confirmed_bookings, 1)
+
+
+class ImportStudentsTests(TestCase):
+    HEADER = 'email,first_name,last_name,phone_number,date_of_birth,password\n'
+
+    def import_csv(self, content, **options):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(self.HEADER + content)
+        self.addCleanup(os.remove, file.name)
+        out = StringIO()
+        call_command('import_students', file.name, stdout=out, **options)
+        return out.getvalue()
+
+    def test_imports_students_in_chunks(self):
+        rows = ''.join(f'student{i}@school.example,Ann,Nowak {i},123456789,2010-05-0{i % 9 + 1},\n' for i in range(7))
+        output = self.import_csv(rows + 'pass@school.example,Jan,Kowalski,987654321,2011-01-01,secret123\n', chunk_size=3)
+
+        self.assertIn('Imported 8 student(s).', output)
+        self.assertEqual(Student.objects.count(), 8)
+        student = Student.objects.select_related('user').get(email='pass@school.example')
+        self.assertEqual(student.user.email, student.email)
+        self.assertEqual(student.user.role, 'student')
+        self.assertTrue(check_password('secret123', student.user.password))
+        # Bez hasła w pliku - konto bez możliwości logowania do czasu resetu
+        self.assertFalse(CustomUser.objects.get(email='student0@school.example').has_usable_password())
+
+    def test_invalid_rows_abort_import(self):
+        CustomUser.objects.create_user(email='taken@school.example', password='testpass123')
+        rows = (
+            'ok@school.example,Ann,Nowak,123456789,2010-05-01,\n'
+            'taken@school.example,Jan,Kowalski,123456789,2010-05-01,\n'
+            'ok@school.example,Ewa,Lis,123456789,2010-05-01,\n'
+            'bad-email,Ola,Wiśniewska,123456789,not-a-date,\n'
+        )
+        with self.assertRaises(CommandError) as raised:
+            self.import_csv(rows)
+
+        message = str(raised.exception)
+        self.assertIn('3 invalid row(s)', message)
+        for line in (3, 4, 5):
+            self.assertIn(f'line {line}:', message)
+        self.assertEqual(Student.objects.count(), 0)
+        self.assertEqual(CustomUser.objects.count(), 1)
+
+    def test_missing_columns(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('email,first_name\nann@school.example,Ann\n')
+        self.addCleanup(os.remove, file.name)
+        with self.assertRaises(CommandError) as raised:
+            call_command('import_students', file.name, stdout=StringIO())
+        self.assertIn('date_of_birth', str(raised.exception))
+
+
+class HashPasswordsTests(SimpleTestCase):
+    def test_process_pool(self):
+        hashes = hash_passwords(['first', '', 'second'], processes=2)
+        self.assertTrue(check_password('first', hashes[0]))
+        self.assertFalse(hashes[1].startswith('pbkdf2'))
+        self.assertTrue(check_password('second', hashes[2]))
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Class, CustomUser
+from ..replica import ReplicaRouter, note_write, read_from_replica, recently_wrote, replica_alias
+
+
+class SQLiteProfileTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        # baza testowa jest w pamięci, więc journal_mode zostaje 'memory' - reszta musi być ustawiona
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(self.pragma('cache_size'), settings.SQLITE_PRAGMAS['cache_size'])
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+    def test_persistent_connections(self):
+        database = settings.DATABASES['default']
+        self.assertGreater(database['CONN_MAX_AGE'], 0)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        patcher = mock.patch('api.replica.replica_alias', return_value='replica')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_test_database_mirrors_default(self):
+        mock.patch.stopall()
+        self.assertIsNone(replica_alias())
+
+    def test_reads_use_replica_only_when_enabled(self):
+        self.assertIsNone(self.router.db_for_read(Class))
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Class), 'replica')
+        self.assertIsNone(self.router.db_for_read(Class))
+
+    def test_write_pins_following_reads_to_primary(self):
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_write(Class), 'default')
+            self.assertIsNone(self.router.db_for_read(Class))
+
+    def test_reads_inside_transaction_use_primary(self):
+        with read_from_replica(), mock.patch.object(connection, 'in_atomic_block', True):
+            self.assertIsNone(self.router.db_for_read(Class))
+
+    def test_replica_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'api'))
+        self.assertIsNone(self.router.allow_migrate('default', 'api'))
+
+
+class ReadYourWritesTests(TransactionTestCase):
+    def setUp(self):
+        caches[settings.REPLICA_STATE_CACHE_ALIAS].clear()
+        patcher = mock.patch('api.replica.replica_alias', return_value='replica')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = CustomUser.objects.create_user(email='reader@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_unsafe_request_marks_user_as_writer(self):
+        self.assertFalse(recently_wrote(self.user))
+        self.client.post(reverse('booking-create'), {}, format='json')
+        self.assertTrue(recently_wrote(self.user))
+
+    def test_list_reads_from_replica(self):
+        # alias 'replica' jest w teście niedostępny - próba odczytu dowodzi routingu
+        with self.assertRaisesMessage(AssertionError, "'replica'"):
+            self.client.get(reverse('class-list'))
+
+    def test_recent_writer_reads_from_primary(self):
+        note_write(self.user)
+        response = self.client.get(reverse('class-list'))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,68 @@
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import SimpleTestCase, TestCase
+
+from ..hashing import HashingExecutor, HashingSaturated, authenticate, hash_password
+from ..models import CustomUser
+
+
+class HashingExecutorTests(SimpleTestCase):
+    def test_rejects_when_pool_and_queue_full(self):
+        executor = HashingExecutor(workers=1, queue_size=1)
+        release = threading.Event()
+        running = executor.submit(release.wait)
+        queued = executor.submit(release.wait)
+        with self.assertRaises(HashingSaturated):
+            executor.submit(release.wait)
+
+        stats = executor.stats()
+        self.assertEqual((stats['running'], stats['queued'], stats['rejected']), (1, 1, 1))
+        self.assertEqual(stats['peak_queued'], 1)
+
+        release.set()
+        running.result(timeout=5)
+        queued.result(timeout=5)
+        self.assertEqual(executor.stats()['completed'], 2)
+        # Po zwolnieniu miejsca zgłoszenia znów są przyjmowane
+        self.assertIsNone(executor.submit(lambda: None).result(timeout=5))
+
+    def test_max_in_flight_caps_pool_and_queue(self):
+        executor = HashingExecutor(workers=2, queue_size=16, max_in_flight=2)
+        release = threading.Event()
+        running = [executor.submit(release.wait) for _ in range(2)]
+        with self.assertRaises(HashingSaturated):
+            executor.submit(release.wait)
+        self.assertEqual(executor.stats()['limit'], 2)
+        release.set()
+        for future in running:
+            future.result(timeout=5)
+
+    def test_run_returns_result(self):
+        executor = HashingExecutor(workers=2, queue_size=0)
+        self.assertEqual(async_to_sync(executor.run)(sum, [1, 2, 3]), 6)
+
+
+class AuthenticateTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='test@example.com', password='testpass123')
+
+    def test_authenticate(self):
+        self.assertEqual(async_to_sync(authenticate)('test@example.com', 'testpass123'), self.user)
+        self.assertIsNone(async_to_sync(authenticate)('test@example.com', 'wrong'))
+        self.assertIsNone(async_to_sync(authenticate)('missing@example.com', 'testpass123'))
+
+    def test_hash_password(self):
+        encoded = async_to_sync(hash_password)('secret')
+        self.assertTrue(check_password('secret', encoded))
+
+    def test_outdated_hash_upgraded(self):
+        with self.settings(PASSWORD_HASHERS=[
+            'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+            'django.contrib.auth.hashers.MD5PasswordHasher',
+        ]):
+            CustomUser.objects.filter(pk=self.user.pk).update(password=make_password('testpass123', hasher='md5'))
+            self.assertEqual(async_to_sync(authenticate)('test@example.com', 'testpass123'), self.user)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
@@ -3,7 +3,8 @@ from datetime import timedelta
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.test import TestCase
-from api.models import CustomUser, Student, Class, Instructor, Booking, Payment, SchoolInfo, Attendance
+from api.models import CustomUser, Student, Class, Instructor, Booking, Payment, SchoolInfo, Attendance, ClassFullError, \
+    ClassDailyStats
 
 
 class CustomUserTests(TestCase):
@@ -259,6 +260,187 @@ class BookingTests(TestCase):
         booking = Booking.objects.create(**self.booking_data)
         self.assertIn(booking.status, dict(Booking._meta.get_field('status').choices).keys())
 
+    def test_confirmed_count_follows_booking_status(self):
+        booking = Booking.objects.create(**self.booking_data)
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.confirmed_count, 1)
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.confirmed_count, 0)
+
+        booking.status = 'confirmed'
+        booking.save()
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.confirmed_count, 1)
+
+        Booking.objects.get(pk=booking.pk).delete()
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.confirmed_count, 0)
+
+    def test_confirmed_booking_rejected_when_class_full(self):
+        self.class_instance.max_participants = 1
+        self.class_instance.save()
+        Booking.objects.create(**self.booking_data)
+
+        other_user = CustomUser.objects.create_user(email='other@example.com', password='testpass123')
+        other_student = Student.objects.create(
+            user=other_user,
+            first_name='Other',
+            last_name='Student',
+            email='other@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        with self.assertRaises(ClassFullError):
+            Booking.objects.create(student=other_student, class_model=self.class_instance, status='confirmed')
+        self.assertEqual(Booking.objects.count(), 1)
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.confirmed_count, 1)
+
+    def test_deleting_confirmed_booking_promotes_first_waiting(self):
+        self.class_instance.max_participants = 1
+        self.class_instance.save()
+        booking = Booking.objects.create(**self.booking_data)
+        other_user = CustomUser.objects.create_user(email='other@example.com', password='testpass123')
+        other_student = Student.objects.create(
+            user=other_user,
+            first_name='Other',
+            last_name='Student',
+            email='other@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        waiting = Booking.objects.create(student=other_student, class_model=self.class_instance, status='waiting')
+
+        booking.delete()
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.status, 'confirmed')
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.confirmed_count, 1)
+
+    def test_raising_max_participants_promotes_waiting(self):
+        self.class_instance.max_participants = 1
+        self.class_instance.save()
+        Booking.objects.create(**self.booking_data)
+        other_user = CustomUser.objects.create_user(email='other@example.com', password='testpass123')
+        other_student = Student.objects.create(
+            user=other_user,
+            first_name='Other',
+            last_name='Student',
+            email='other@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        waiting = Booking.objects.create(student=other_student, class_model=self.class_instance, status='waiting')
+
+        class_instance = Class.objects.get(pk=self.class_instance.pk)
+        class_instance.max_participants = 2
+        class_instance.save()
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.status, 'confirmed')
+        self.assertEqual(class_instance.confirmed_count, 2)
+        class_instance.refresh_from_db()
+        self.assertEqual(class_instance.confirmed_count, 2)
+        self.assertEqual(ClassDailyStats.objects.get(class_model=class_instance).confirmed_bookings, 2)
+
+    def test_cancelling_series_booking_promotes_waiting_session_booking(self):
+        self.class_instance.max_participants = 1
+        self.class_instance.save()
+        series = Booking.objects.create(**self.booking_data)
+        occurrence = self.class_instance.occurrences.filter(start_time__gt=timezone.now()).first()
+        other_user = CustomUser.objects.create_user(email='other@example.com', password='testpass123')
+        other_student = Student.objects.create(
+            user=other_user,
+            first_name='Other',
+            last_name='Student',
+            email='other@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        waiting = Booking.objects.create(
+            student=other_student, class_model=self.class_instance, occurrence=occurrence, status='waiting'
+        )
+
+        series.status = 'cancelled'
+        series.save()
+        waiting.refresh_from_db()
+        occurrence.refresh_from_db()
+        self.assertEqual(waiting.status, 'confirmed')
+        self.assertEqual(occurrence.confirmed_count, 1)
+        self.assertEqual(occurrence.available_slots(), 0)
+
+    def test_class_save_with_deferred_max_participants(self):
+        class_instance = Class.objects.only('name').get(pk=self.class_instance.pk)
+        class_instance.name = 'Renamed'
+        class_instance.save()
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.name, 'Renamed')
+
+    def test_occurrence_bookings_use_per_session_capacity(self):
+        self.class_instance.max_participants = 1
+        self.class_instance.save()
+        first, second = self.class_instance.occurrences.all()[:2]
+
+        Booking.objects.create(occurrence=first, **self.booking_data)
+        Booking.objects.create(occurrence=second, **self.booking_data)
+        first.refresh_from_db()
+        self.class_instance.refresh_from_db()
+        self.assertEqual(first.confirmed_count, 1)
+        self.assertEqual(first.available_slots(), 0)
+        self.assertEqual(self.class_instance.confirmed_count, 0)
+
+        other_user = CustomUser.objects.create_user(email='other@example.com', password='testpass123')
+        other_student = Student.objects.create(
+            user=other_user,
+            first_name='Other',
+            last_name='Student',
+            email='other@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        with self.assertRaises(ClassFullError):
+            Booking.objects.create(
+                student=other_student, class_model=self.class_instance, occurrence=first, status='confirmed'
+            )
+
+    def test_class_booking_respects_full_occurrence(self):
+        self.class_instance.max_participants = 1
+        self.class_instance.save()
+        first = self.class_instance.occurrences.first()
+        other_user = CustomUser.objects.create_user(email='other@example.com', password='testpass123')
+        other_student = Student.objects.create(
+            user=other_user,
+            first_name='Other',
+            last_name='Student',
+            email='other@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        Booking.objects.create(occurrence=first, **self.booking_data)
+
+        # Miejsce w terminie first jest zajęte - rezerwacja całego cyklu by go przepełniła
+        with self.assertRaises(ClassFullError):
+            Booking.objects.create(student=other_student, class_model=self.class_instance, status='confirmed')
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.confirmed_count, 0)
+
+        # Po zwolnieniu terminu rezerwacja cyklu przechodzi, a termin jest znów pełny
+        Booking.objects.filter(occurrence=first).get().delete()
+        Booking.objects.create(student=other_student, class_model=self.class_instance, status='confirmed')
+        first.refresh_from_db()
+        self.assertEqual(first.available_slots(), 0)
+
+    def test_class_save_keeps_confirmed_count(self):
+        stale = Class.objects.get(pk=self.class_instance.pk)
+        Booking.objects.create(**self.booking_data)
+        stale.name = 'Renamed'
+        stale.save()
+        self.class_instance.refresh_from_db()
+        self.assertEqual(self.class_instance.name, 'Renamed')
+        self.assertEqual(self.class_instance.confirmed_count, 1)
+
 
 class InstructorTests(TestCase):
     def setUp(self):
@@ -1,9 +1,14 @@
 # test_permissions.py
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
 from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.test import APIRequestFactory
+from ..authentication import ClaimsJWTAuthentication
 from ..permissions import IsStudent, IsInstructor, IsAdmin
-from ..models import CustomUser
+from ..models import CustomUser, Student
+from ..serializers import CustomTokenObtainPairSerializer
 
 
 class PermissionTests(TestCase):
@@ -90,3 +95,60 @@ class PermissionTests(TestCase):
         self.assertFalse(IsStudent().has_permission(request, None))
         self.assertFalse(IsInstructor().has_permission(request, None))
         self.assertFalse(IsAdmin().has_permission(request, None))
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        caches[settings.AUTH_STATE_CACHE_ALIAS].clear()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='testpass123',
+            role='admin'
+        )
+        self.auth = ClaimsJWTAuthentication()
+
+    def token(self, user):
+        return str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+    def authenticate(self, user, token=None):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token or self.token(user)}')
+        return self.auth.authenticate(request)[0]
+
+    def test_permissions_from_claims_without_queries(self):
+        token = self.token(self.admin)
+        self.authenticate(self.admin, token)  # stan użytkownika trafia do cache
+        request = APIRequestFactory().get('/')
+        with self.assertNumQueries(0):
+            request.user = self.authenticate(self.admin, token)
+            self.assertTrue(IsAdmin().has_permission(request, None))
+            self.assertFalse(IsStudent().has_permission(request, None))
+            self.assertEqual(request.user.pk, self.admin.pk)
+
+    def test_model_fields_load_user_lazily(self):
+        user = self.authenticate(self.admin)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'admin@example.com')
+            self.assertEqual(user.first_name, self.admin.first_name)
+
+    def test_student_id_claim(self):
+        user = CustomUser.objects.create_user(email='student@example.com', password='testpass123')
+        student = Student.objects.create(
+            user=user, first_name='Test', last_name='Student', email='student@example.com',
+            phone_number='123456789', date_of_birth='2000-01-01'
+        )
+        self.assertEqual(self.authenticate(user).student_id, student.pk)
+        self.assertIsNone(self.authenticate(self.admin).student_id)
+
+    def test_deactivated_user_rejected(self):
+        self.authenticate(self.admin)
+        self.admin.is_active = False
+        self.admin.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.admin)
+
+    def test_changed_role_rejected(self):
+        token = self.token(self.admin)
+        CustomUser.objects.filter(pk=self.admin.pk).update(role='student')
+        caches[settings.AUTH_STATE_CACHE_ALIAS].clear()  # jak po wygaśnięciu TTL
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.admin, token)
@@ -0,0 +1,64 @@
+import re
+from datetime import date
+
+from django.db.models import Count
+from django.test import TestCase
+
+from ..models import Attendance, Booking, Class, ClassDailyStats, ClassOccurrence, Payment
+from ..schedule import classes_in_window
+
+# "SCAN api_booking" bez "USING ... INDEX" - przejście po całej tabeli
+FULL_SCAN = re.compile(r'\bSCAN \w+$', re.MULTILINE)
+
+
+def _group_count(queryset, field):
+    # kształt skorelowanych COUNT-ów z api.models._count_rows
+    return queryset.order_by().values(field).annotate(count=Count('id'))
+
+
+HOT_QUERIES = {
+    'student bookings page': lambda: Booking.objects.filter(student_id=1).order_by('-booking_date', '-id')[:50],
+    'duplicate booking check': lambda: Booking.objects.filter(student_id=1, class_model_id=1, occurrence_key=0),
+    'class confirmed count': lambda: _group_count(
+        Booking.objects.filter(class_model_id=1, occurrence__isnull=True, status='confirmed'), 'status'
+    ),
+    'occurrence confirmed count': lambda: _group_count(
+        Booking.objects.filter(occurrence_id=1, status='confirmed'), 'status'
+    ),
+    'class waitlist': lambda: Booking.objects.waitlist((Class, 1))[:1],
+    'occurrence waitlist': lambda: Booking.objects.waitlist((ClassOccurrence, 1))[:1],
+    'attendance booking statuses': lambda: Booking.objects.filter(
+        class_model_id=1, student_id__in=[1, 2, 3]
+    ).values_list('student_id', 'occurrence_key', 'status'),
+    'classes in schedule window': lambda: classes_in_window(Class.objects.all(), date(2025, 1, 6), date(2025, 1, 12)),
+    'class occurrences in window': lambda: ClassOccurrence.objects.filter(
+        class_model_id=1, date__range=(date(2025, 1, 6), date(2025, 1, 12))
+    ),
+    'attendance list page': lambda: Attendance.objects.filter(class_instance_id=1).order_by('created_at', 'id')[:50],
+    'attendance record': lambda: Attendance.objects.filter(class_instance_id=1, student_id=1, occurrence_key=0),
+    'attendance status count': lambda: _group_count(
+        Attendance.objects.filter(class_instance_id=1, status='present'), 'status'
+    ),
+    'payments page': lambda: Payment.objects.order_by('-created_at', '-id')[:50],
+    'student payments page': lambda: Payment.objects.filter(student_id=1).order_by('-created_at', '-id')[:50],
+    'payments by status': lambda: Payment.objects.filter(status='pending').order_by('-created_at', '-id')[:50],
+    'daily stats window': lambda: ClassDailyStats.objects.filter(day__range=(date(2025, 1, 1), date(2025, 1, 31))),
+}
+
+# Skorelowane liczniki (ClassQuerySet/ClassDailyStatsQuerySet) nie powinny czytać wierszy tabeli
+COVERING = ('class confirmed count', 'occurrence confirmed count', 'attendance status count')
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for name, build in HOT_QUERIES.items():
+            with self.subTest(query=name):
+                plan = build().explain()
+                self.assertIsNone(FULL_SCAN.search(plan), f"{name}: full table scan\n{plan}")
+
+    def test_counters_use_covering_indexes(self):
+        for name in COVERING:
+            with self.subTest(query=name):
+                plan = HOT_QUERIES[name]().explain()
+                self.assertIn('USING COVERING INDEX', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
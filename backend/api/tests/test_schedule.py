@@ -0,0 +1,112 @@
+from datetime import date, datetime, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Class, ClassOccurrence, Instructor
+from api.schedule import OCCURRENCE_HORIZON_DAYS, weekday_mask, expand_class, expand_schedule, \
+    materialize_occurrences
+
+
+class WeekdayMaskTests(TestCase):
+    def test_mask_from_csv(self):
+        self.assertEqual(weekday_mask('MO,WE,FR'), 0b0010101)
+        self.assertEqual(weekday_mask('su'), 0b1000000)
+
+    def test_mask_ignores_unknown_codes(self):
+        self.assertEqual(weekday_mask('MO, XX,,TU'), 0b0000011)
+        self.assertEqual(weekday_mask(None), 0)
+
+
+class ExpandClassTests(TestCase):
+    def setUp(self):
+        self.instructor = Instructor.objects.create(
+            first_name='Jane',
+            last_name='Smith',
+            email='jane@example.com',
+            specialization='Salsa'
+        )
+        # Poniedziałek 6 stycznia 2025, 18:00-19:30
+        self.start = timezone.make_aware(datetime(2025, 1, 6, 18, 0))
+        self.recurring = Class.objects.create(
+            name='Salsa Weekly',
+            style='Salsa',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=self.start,
+            end_time=self.start + timedelta(minutes=90),
+            days_of_week='MO,WE',
+            is_recurring=True
+        )
+        self.single = Class.objects.create(
+            name='Tango Workshop',
+            style='Tango',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=self.start + timedelta(days=3),
+            end_time=self.start + timedelta(days=3, hours=2)
+        )
+
+    def test_recurring_class_expands_to_weekdays(self):
+        occurrences = expand_class(self.recurring, date(2025, 1, 1), date(2025, 1, 19))
+        self.assertEqual(
+            [occurrence.start.date() for occurrence in occurrences],
+            [date(2025, 1, 6), date(2025, 1, 8), date(2025, 1, 13), date(2025, 1, 15)]
+        )
+        for occurrence in occurrences:
+            self.assertEqual(timezone.localtime(occurrence.start).hour, 18)
+            self.assertEqual(occurrence.end - occurrence.start, timedelta(minutes=90))
+
+    def test_single_class_only_inside_window(self):
+        self.assertEqual(len(expand_class(self.single, date(2025, 1, 9), date(2025, 1, 9))), 1)
+        self.assertEqual(expand_class(self.single, date(2025, 1, 10), date(2025, 1, 20)), ())
+
+    def test_expand_schedule_is_chronological(self):
+        occurrences = expand_schedule(Class.objects.all(), date(2025, 1, 6), date(2025, 1, 9))
+        self.assertEqual(
+            [(class_instance.name, occurrence.start.day) for class_instance, occurrence in occurrences],
+            [('Salsa Weekly', 6), ('Salsa Weekly', 8), ('Tango Workshop', 9)]
+        )
+
+
+class MaterializeOccurrencesTests(TestCase):
+    def setUp(self):
+        self.instructor = Instructor.objects.create(
+            first_name='Jane',
+            last_name='Smith',
+            email='jane@example.com',
+            specialization='Salsa'
+        )
+        self.today = timezone.localdate()
+        start = timezone.make_aware(datetime.combine(self.today, datetime.min.time()).replace(hour=18))
+        self.dance_class = Class.objects.create(
+            name='Daily Salsa',
+            style='Salsa',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            days_of_week='MO,TU,WE,TH,FR,SA,SU',
+            is_recurring=True
+        )
+
+    def test_class_save_generates_horizon(self):
+        dates = list(self.dance_class.occurrences.values_list('date', flat=True))
+        self.assertEqual(dates[0], self.today)
+        self.assertEqual(dates[-1], self.today + timedelta(days=OCCURRENCE_HORIZON_DAYS))
+        self.assertEqual(len(dates), OCCURRENCE_HORIZON_DAYS + 1)
+
+    def test_materialize_is_incremental(self):
+        created = materialize_occurrences(Class.objects.all(), horizon_days=OCCURRENCE_HORIZON_DAYS + 3)
+        self.assertEqual(created, 3)
+        self.assertEqual(materialize_occurrences(Class.objects.all(), horizon_days=OCCURRENCE_HORIZON_DAYS + 3), 0)
+
+    def test_schedule_change_resyncs_future_occurrences(self):
+        self.dance_class.days_of_week = 'MO'
+        self.dance_class.save()
+        weekdays = {occurrence.date.weekday() for occurrence in self.dance_class.occurrences.all()}
+        self.assertEqual(weekdays, {0})
+
+        self.dance_class.is_recurring = False
+        self.dance_class.save()
+        self.assertFalse(ClassOccurrence.objects.filter(class_model=self.dance_class).exists())
@@ -113,7 +113,7 @@ class StudentSerializerTests(TestCase):
         expected_fields = {
             'id', 'user', 'first_name', 'last_name',
             'email', 'phone_number', 'date_of_birth',
-            'joined_date'
+            'joined_date', 'updated_at'
         }
         self.assertEqual(set(serializer.data.keys()), expected_fields)
 
@@ -466,8 +466,9 @@ class BookingSerializerTests(TestCase):
             'status': 'confirmed'
         }
         serializer = BookingSerializer(data=data)
-        self.assertFalse(serializer.is_valid())
-        self.assertIn('No spots available', str(serializer.errors))
+        self.assertTrue(serializer.is_valid())
+        # Brak miejsc - rezerwacja trafi na listę oczekujących
+        self.assertEqual(serializer.validated_data['status'], 'waiting')
 
 
 class AttendanceReportSerializerTests(TestCase):
@@ -623,9 +624,10 @@ class AttendanceSerializerTests(TestCase):
 
     def test_attendance_serializer_fields(self):
         serializer = AttendanceSerializer(self.attendance)
-        expected_fields = {'id', 'student', 'status', 'is_booked',
+        expected_fields = {'id', 'student', 'occurrence', 'student_name', 'status', 'is_booked',
                            'booking_status', 'notes', 'created_at'}
         self.assertEqual(set(serializer.data.keys()), expected_fields)
+        self.assertEqual(serializer.data['student_name'], 'John Doe')
 
     def test_get_booking_status(self):
         serializer = AttendanceSerializer(self.attendance)
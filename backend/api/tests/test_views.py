@@ -1,10 +1,25 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
-from ..models import CustomUser, Student, Instructor, Class, Booking, Payment, SchoolInfo, Attendance
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+from ..models import CustomUser, Student, Instructor, Class, Booking, Payment, SchoolInfo, Attendance, \
+    ClassDailyStats
+from .. import catalog_cache, hashing
+from ..pagination import CreatedAtCursorPagination
+from ..views import CustomTokenObtainPairView, RegisterUserView
+from ..school_info import invalidate_school_info
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 
 class CustomTokenObtainPairViewTests(APITestCase):
@@ -32,6 +47,17 @@ class CustomTokenObtainPairViewTests(APITestCase):
         self.assertEqual(response.data['lastName'], self.user.last_name)
         self.assertEqual(response.data['role'], self.user.role)
 
+    def test_obtain_token_single_query(self):
+        Student.objects.create(
+            user=self.user, first_name='John', last_name='Doe', email='test@example.com',
+            phone_number='123456789', date_of_birth='2000-01-01'
+        )
+        # Jedno zapytanie o użytkownika (razem ze studentem) - profil i claimy bez kolejnych
+        with self.assertNumQueries(1):
+            response = self.client.post(self.login_url, {'email': 'test@example.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['firstName'], 'John')
+
     def test_obtain_token_invalid_credentials(self):
         data = {
             'email': 'test@example.com',
@@ -45,6 +71,22 @@ class CustomTokenObtainPairViewTests(APITestCase):
         response = self.client.post(self.login_url, data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_obtain_token_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(self.login_url, {'email': 'test@example.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_view_is_async(self):
+        self.assertTrue(iscoroutinefunction(CustomTokenObtainPairView.as_view()))
+        self.assertTrue(iscoroutinefunction(RegisterUserView.as_view()))
+
+    def test_obtain_token_hashing_saturated(self):
+        with mock.patch.object(hashing.password_hashing, 'submit', side_effect=hashing.HashingSaturated):
+            response = self.client.post(self.login_url, {'email': 'test@example.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '2')
+
 
 class RegisterUserViewTests(APITestCase):
     def setUp(self):
@@ -97,6 +139,19 @@ class RegisterUserViewTests(APITestCase):
         self.assertEqual(CustomUser.objects.count(), 1)
         self.assertEqual(Student.objects.count(), 1)
 
+    def test_register_user_atomic(self):
+        with mock.patch.object(Student.objects, 'create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.register_url, self.valid_data)
+        self.assertEqual(CustomUser.objects.count(), 0)
+
+    def test_register_user_hashing_saturated(self):
+        with mock.patch.object(hashing.password_hashing, 'submit', side_effect=hashing.HashingSaturated):
+            response = self.client.post(self.register_url, self.valid_data)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(CustomUser.objects.count(), 0)
+
 
 class StudentViewTests(APITestCase):
     def setUp(self):
@@ -118,8 +173,8 @@ class StudentViewTests(APITestCase):
     def test_student_list(self):
         response = self.client.get('/api/students/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['first_name'], self.student.first_name)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['first_name'], self.student.first_name)
 
     def test_student_detail(self):
         response = self.client.get(f'/api/students/{self.student.id}/')
@@ -258,7 +313,7 @@ class InstructorViewTests(APITestCase):
     def test_instructor_list(self):
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
 
     def test_instructor_detail(self):
         response = self.client.get(self.detail_url)
@@ -318,6 +373,80 @@ class ClassViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['name'], 'Test Class')
 
+    def test_class_list_single_query(self):
+        student = Student.objects.create(
+            user=self.user,
+            first_name='John',
+            last_name='Doe',
+            email='test@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        for i in range(3):
+            dance_class = Class.objects.create(
+                name=f'Class {i}',
+                style='Salsa',
+                max_participants=5,
+                instructor=self.instructor
+            )
+            Booking.objects.create(student=student, class_model=dance_class, status='confirmed')
+
+        # walidatory ETag (jeden agregat) + lista zajęć
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/classes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
+        slots = {item['name']: item['available_slots'] for item in response.data['results']}
+        self.assertEqual(slots['Test Class'], 10)
+        self.assertEqual(slots['Class 0'], 4)
+
+    def test_class_catalog_cached(self):
+        catalog_cache.reset_stats()
+        first = self.client.get(f'/api/classes/{self.test_class.id}/')
+        with self.assertNumQueries(0):
+            second = self.client.get(f'/api/classes/{self.test_class.id}/')
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(catalog_cache.stats()['hits'], 1)
+        self.assertEqual(catalog_cache.stats()['misses'], 1)
+
+    def test_class_catalog_process_local_cache_uses_short_timeout(self):
+        # LocMemCache nie widzi unieważnień z innych workerów - wpis żyje krótko
+        with self.settings(CATALOG_CACHE_LOCAL_TIMEOUT=7), \
+                mock.patch.object(catalog_cache.caches['default'], 'set') as cache_set:
+            self.client.get(f'/api/classes/{self.test_class.id}/')
+        self.assertTrue(cache_set.called)
+        self.assertEqual({call.args[2] for call in cache_set.call_args_list}, {7})
+
+    def test_class_catalog_invalidated_by_booking_status(self):
+        student = Student.objects.create(
+            user=self.user,
+            first_name='John',
+            last_name='Doe',
+            email='test@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        booking = Booking.objects.create(student=student, class_model=self.test_class, status='waiting')
+        self.client.get('/api/classes/')
+        self.client.get(f'/api/classes/{self.test_class.id}/')
+
+        booking.status = 'confirmed'
+        booking.save()
+        response = self.client.get('/api/classes/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['available_slots'], 9)
+        response = self.client.get(f'/api/classes/{self.test_class.id}/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['available_slots'], 9)
+
+    def test_class_catalog_invalidated_by_instructor_change(self):
+        self.client.get(f'/api/classes/{self.test_class.id}/')
+        self.instructor.last_name = 'Renamed'
+        self.instructor.save()
+        response = self.client.get(f'/api/classes/{self.test_class.id}/')
+        self.assertEqual(response.data['instructor'], 'Test Renamed')
+
     def test_retrieve_nonexistent_class(self):
         response = self.client.get('/api/classes/999/')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -370,6 +499,64 @@ class ClassViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class ScheduleViewTests(APITestCase):
+    def setUp(self):
+        self.instructor = Instructor.objects.create(
+            first_name='Test',
+            last_name='Instructor',
+            email='instructor@test.com',
+            specialization='Salsa'
+        )
+        start = timezone.make_aware(datetime(2025, 1, 6, 18, 0))  # poniedziałek
+        self.dance_class = Class.objects.create(
+            name='Salsa Weekly',
+            style='Salsa',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            days_of_week='MO,FR',
+            is_recurring=True
+        )
+
+    def test_schedule_window(self):
+        response = self.client.get('/api/schedule/', {'from': '2025-01-06', 'to': '2025-01-12'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['start'] for item in response.data], ['2025-01-06 18:00', '2025-01-10 18:00'])
+        self.assertEqual(response.data[0]['class_id'], self.dance_class.id)
+        self.assertEqual(response.data[0]['instructor'], 'Test Instructor')
+        self.assertEqual(response.data[0]['available_slots'], 10)
+
+    def test_schedule_links_materialized_occurrences(self):
+        today = timezone.localdate()
+        response = self.client.get('/api/schedule/', {'from': today.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        occurrence_ids = set(
+            self.dance_class.occurrences.filter(date__lte=today + timedelta(days=6)).values_list('id', flat=True)
+        )
+        self.assertEqual({item['occurrence_id'] for item in response.data}, occurrence_ids)
+
+    def test_class_occurrence_list(self):
+        today = timezone.localdate()
+        response = self.client.get(
+            f'/api/classes/{self.dance_class.id}/occurrences/',
+            {'from': today.isoformat(), 'to': (today + timedelta(days=13)).isoformat()}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(response.data[0]['available_slots'], 10)
+        response = self.client.get('/api/classes/999/occurrences/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_schedule_invalid_window(self):
+        response = self.client.get('/api/schedule/', {'from': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/schedule/', {'from': '2025-01-10', 'to': '2025-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/schedule/', {'from': '2025-01-01', 'to': '2025-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class BookingViewTests(APITestCase):
     def setUp(self):
         # Create user and student
@@ -417,8 +604,34 @@ class BookingViewTests(APITestCase):
     def test_booking_list(self):
         response = self.client.get('/api/bookings/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['id'], self.booking.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], self.booking.id)
+
+    def test_booking_list_not_modified(self):
+        etag = self.client.get('/api/bookings/')['ETag']
+        # profil studenta + agregat walidatorów, bez pobierania i serializacji rezerwacji
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        response = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_booking_list_if_modified_since_alone_not_answered_with_304(self):
+        last_modified = self.client.get('/api/bookings/')['Last-Modified']
+        # Zmiana w tej samej sekundzie co Last-Modified - tylko ETag ją odróżnia
+        response = self.client.get('/api/bookings/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_booking_list_etag_follows_class_changes(self):
+        etag = self.client.get('/api/bookings/')['ETag']
+        self.instructor.first_name = 'Renamed'
+        self.instructor.save()
+        response = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_booking_list_unauthenticated(self):
         self.client.force_authenticate(user=None)
@@ -464,13 +677,117 @@ class BookingViewTests(APITestCase):
             status='confirmed'
         )
 
+        waiting_user = CustomUser.objects.create_user(
+            email='waiting@example.com',
+            password='testpass123',
+            role='student'
+        )
+        Student.objects.create(
+            user=waiting_user,
+            first_name='Waiting',
+            last_name='Student',
+            email='waiting@example.com',
+            phone_number='987654321',
+            date_of_birth='2000-01-01'
+        )
+        self.client.force_authenticate(user=waiting_user)
         data = {
             'class_model': self.dance_class.id,
             'status': 'confirmed'
         }
         response = self.client.post('/api/bookings/create/', data)
+        # Brak miejsc - rezerwacja trafia na listę oczekujących
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'waiting')
+        self.dance_class.refresh_from_db()
+        self.assertEqual(self.dance_class.confirmed_count, 2)
+
+    def test_booking_create_duplicate(self):
+        response = self.client.post('/api/bookings/create/', {'class_model': self.dance_class.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('already booked', str(response.data))
+
+    def test_booking_cancel_promotes_waiting(self):
+        students = [
+            Student.objects.create(
+                user=CustomUser.objects.create_user(email=f'queue{i}@example.com', password='pass123'),
+                first_name='Queue',
+                last_name=f'Student {i}',
+                email=f'queue{i}@example.com',
+                phone_number='987654321',
+                date_of_birth='2000-01-01'
+            )
+            for i in range(3)
+        ]
+        Booking.objects.create(student=students[0], class_model=self.dance_class, status='confirmed')
+        first = Booking.objects.create(student=students[1], class_model=self.dance_class, status='waiting')
+        second = Booking.objects.create(student=students[2], class_model=self.dance_class, status='waiting')
+
+        response = self.client.delete(f'/api/bookings/{self.booking.id}/delete/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status), ('confirmed', 'waiting'))
+        self.dance_class.refresh_from_db()
+        self.assertEqual(self.dance_class.confirmed_count, 2)
+
+    def test_booking_create_for_occurrence(self):
+        recurring = Class.objects.create(
+            name='Weekly Class',
+            style='Salsa',
+            max_participants=5,
+            instructor=self.instructor,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1),
+            days_of_week='MO,TU,WE,TH,FR,SA,SU',
+            is_recurring=True
+        )
+        first, second = recurring.occurrences.all()[:2]
+        for occurrence in (first, second):
+            response = self.client.post('/api/bookings/create/', {
+                'class_model': recurring.id,
+                'occurrence': occurrence.id,
+                'status': 'confirmed'
+            })
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        first.refresh_from_db()
+        self.assertEqual(first.confirmed_count, 1)
+
+        response = self.client.post('/api/bookings/create/', {
+            'class_model': self.dance_class.id,
+            'occurrence': first.id,
+            'status': 'confirmed'
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_booking_series_and_session_exclusive(self):
+        recurring = Class.objects.create(
+            name='Weekly Class',
+            style='Salsa',
+            max_participants=5,
+            instructor=self.instructor,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1),
+            days_of_week='MO,TU,WE,TH,FR,SA,SU',
+            is_recurring=True
+        )
+        first = recurring.occurrences.first()
+        response = self.client.post('/api/bookings/create/', {'class_model': recurring.id, 'occurrence': first.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Termin już zarezerwowany - rezerwacja całego cyklu zajęłaby w nim drugie miejsce
+        response = self.client.post('/api/bookings/create/', {'class_model': recurring.id})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn('No spots available', str(response.data))
+
+        session_booking = Booking.objects.get(occurrence=first)
+        session_booking.status = 'cancelled'
+        session_booking.save()
+        response = self.client.post('/api/bookings/create/', {'class_model': recurring.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        second = recurring.occurrences.all()[1]
+        response = self.client.post('/api/bookings/create/', {'class_model': recurring.id, 'occurrence': second.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        first.refresh_from_db()
+        self.assertEqual(first.available_slots(), 4)
 
     def test_booking_detail(self):
         response = self.client.get(f'/api/bookings/{self.booking.id}/')
@@ -576,6 +893,21 @@ class ReportViewTests(APITestCase):
             self.assertIn('attendance_rate', response.data[0])
             self.assertIn('booked_slots', response.data[0])
 
+    def test_attendance_report_ends_now(self):
+        later = Class.objects.create(
+            name='Later Today',
+            style='Salsa',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=timezone.now() + timedelta(minutes=5)
+        )
+        Booking.objects.create(student=self.student, class_model=later, status='confirmed')
+        self.client.force_authenticate(user=self.admin_user)
+
+        response = self.client.get(reverse('attendance-report', kwargs={'period': 'week'}))
+        # Zajęcia, które jeszcze się nie zaczęły, nie mają obecności do raportowania
+        self.assertEqual([row['class_name'] for row in response.data], ['Test Class'])
+
     def test_attendance_report_different_periods(self):
         self.client.force_authenticate(user=self.admin_user)
         periods = ['week', 'month', 'quarter']
@@ -585,6 +917,26 @@ class ReportViewTests(APITestCase):
             response = self.client.get(url)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_attendance_report_follows_booking_changes(self):
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('attendance-report', kwargs={'period': 'month'})
+        response = self.client.get(url)
+        self.assertEqual(response.data[0]['booked_slots'], 1)
+        self.assertEqual(response.data[0]['attendance_rate'], 10.0)
+
+        self.booking.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data, [])
+
+    def test_reports_read_only_rollups(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('attendance-report', kwargs={'period': 'month'}))
+            self.client.get(reverse('class-analytics', kwargs={'period': 'year'}))
+        tables = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertIn('api_classdailystats', tables)
+        self.assertNotIn('api_booking', tables)
+
     def test_analytics_unauthorized(self):
         url = reverse('class-analytics', kwargs={'period': 'month'})
         response = self.client.get(url)
@@ -629,6 +981,39 @@ class ReportViewTests(APITestCase):
             self.assertIn('name', class_data)
             self.assertIn('booking_count', class_data)
 
+    def test_analytics_single_scan_with_dimensions(self):
+        self.dance_class.room = 'A'
+        self.dance_class.save()
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('class-analytics', kwargs={'period': 'month'})
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'dimensions': 'weekday_hour,room,instructor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['popular_classes'], [{'name': 'Test Class', 'booking_count': 1}])
+        self.assertEqual(response.data['style_distribution'], [{'style': 'Salsa', 'count': 1}])
+        self.assertEqual(response.data['room'], [{'room': 'A', 'class_count': 1, 'booking_count': 1}])
+        self.assertEqual(response.data['instructor'][0]['instructor'], 'Test Instructor')
+        start = timezone.localtime(self.dance_class.start_time)
+        self.assertEqual(
+            (response.data['weekday_hour'][0]['weekday'], response.data['weekday_hour'][0]['hour']),
+            (['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU'][start.weekday()], start.hour)
+        )
+
+    def test_analytics_repeated_dimension_counted_once(self):
+        self.dance_class.room = 'A'
+        self.dance_class.save()
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('class-analytics', kwargs={'period': 'month'})
+        response = self.client.get(url, {'dimensions': 'room,room'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['room'], [{'room': 'A', 'class_count': 1, 'booking_count': 1}])
+
+    def test_analytics_unknown_dimension(self):
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('class-analytics', kwargs={'period': 'month'})
+        response = self.client.get(url, {'dimensions': 'moon_phase'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_analytics_invalid_period(self):
         self.client.force_authenticate(user=self.admin_user)
         url = reverse('class-analytics', kwargs={'period': 'invalid'})
@@ -668,8 +1053,8 @@ class PaymentViewTests(APITestCase):
     def test_payment_list(self):
         response = self.client.get('/api/payments/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['amount'], '100.00')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['amount'], '100.00')
 
     def test_payment_detail(self):
         response = self.client.get(f'/api/payments/{self.payment.id}/')
@@ -707,6 +1092,69 @@ class PaymentViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Payment.objects.count(), 0)
 
+    def test_payment_list_cursor_pagination(self):
+        for amount in range(1, 5):
+            Payment.objects.create(
+                student=self.student,
+                amount=amount,
+                payment_type='single',
+                payment_method='cash'
+            )
+
+        seen = []
+        url = '/api/payments/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        expected = list(Payment.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_payment_list_scoped_to_student(self):
+        other_user = CustomUser.objects.create_user(email='other@example.com', password='testpass123')
+        other_student = Student.objects.create(
+            user=other_user, first_name='Other', last_name='Student', email='other@example.com',
+            phone_number='987654321', date_of_birth='2000-01-01'
+        )
+        Payment.objects.create(student=other_student, amount=30, payment_type='single', payment_method='cash')
+
+        response = self.client.get('/api/payments/?student=%d' % other_student.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [self.payment.id])
+
+    def test_payment_list_admin_filters(self):
+        admin = CustomUser.objects.create_user(email='admin@example.com', password='testpass123', role='admin')
+        completed = Payment.objects.create(
+            student=self.student, amount=200, payment_type='monthly', payment_method='blik', status='completed'
+        )
+        self.client.force_authenticate(user=admin)
+
+        response = self.client.get('/api/payments/')
+        self.assertEqual(len(response.data['results']), 2)
+
+        response = self.client.get('/api/payments/?status=completed&payment_method=blik')
+        self.assertEqual([item['id'] for item in response.data['results']], [completed.id])
+
+        today = timezone.localdate()
+        response = self.client.get(f'/api/payments/?from={today + timedelta(days=1)}')
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get(f'/api/payments/?from={today}&to={today}&student={self.student.id}')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_payment_list_invalid_filter(self):
+        admin = CustomUser.objects.create_user(email='admin@example.com', password='testpass123', role='admin')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/payments/?status=unknown')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+
+    def test_payment_list_page_size_is_capped(self):
+        request = Request(APIRequestFactory().get('/api/payments/', {'page_size': 100000}))
+        self.assertEqual(CreatedAtCursorPagination().get_page_size(request), CreatedAtCursorPagination.max_page_size)
+
     def test_payment_list_unauthenticated(self):
         self.client.force_authenticate(user=None)
         response = self.client.get('/api/payments/')
@@ -737,6 +1185,9 @@ class PaymentViewTests(APITestCase):
 
 class SchoolInfoViewTests(APITestCase):
     def setUp(self):
+        # cache lokalny przeżywa rollback bazy między testami
+        invalidate_school_info()
+        self.addCleanup(invalidate_school_info)
         self.admin_user = CustomUser.objects.create_user(
             email='admin@example.com',
             password='adminpass123',
@@ -783,6 +1234,29 @@ class SchoolInfoViewTests(APITestCase):
         self.assertEqual(response.data['name'], 'New Dance School')
         self.assertEqual(response.data['email'], 'new@school.com')
 
+    def test_get_school_info_cached(self):
+        self.client.get('/api/school-info/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/school-info/')
+        self.assertEqual(response.data['name'], 'Szkoła Tańca')
+
+    def test_update_school_info_invalidates_cache(self):
+        self.client.get('/api/school-info/')
+        self.client.force_authenticate(user=self.admin_user)
+        self.client.put('/api/school-info/update/', self.info_data)
+        response = self.client.get('/api/school-info/')
+        self.assertEqual(response.data['name'], 'New Dance School')
+
+    def test_get_school_info_not_modified(self):
+        etag = self.client.get('/api/school-info/')['ETag']
+        response = self.client.get('/api/school-info/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.force_authenticate(user=self.admin_user)
+        self.client.put('/api/school-info/update/', self.info_data)
+        response = self.client.get('/api/school-info/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_update_school_info_as_regular_user(self):
         self.client.force_authenticate(user=self.regular_user)
         response = self.client.put('/api/school-info/update/', self.info_data)
@@ -833,8 +1307,82 @@ class AttendanceViewTests(APITestCase):
     def test_get_attendance_list(self):
         response = self.client.get(f'/api/classes/{self.dance_class.id}/attendance/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['status'], 'present')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['status'], 'present')
+
+    def test_attendance_list_queries_do_not_grow_with_roster(self):
+        url = f'/api/classes/{self.dance_class.id}/attendance/'
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(url)
+
+        for i in range(5):
+            student = Student.objects.create(
+                user=CustomUser.objects.create_user(email=f'roster{i}@example.com', password='pass123'),
+                first_name='Roster',
+                last_name=f'Student {i}',
+                email=f'roster{i}@example.com',
+                phone_number='123456789',
+                date_of_birth='2000-01-01'
+            )
+            Booking.objects.create(student=student, class_model=self.dance_class, status='confirmed')
+            Attendance.objects.create(class_instance=self.dance_class, student=student, status='present')
+
+        with self.assertNumQueries(len(single.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(response.data['results'][1]['student_name'], 'Roster Student 0')
+        self.assertEqual(response.data['results'][1]['booking_status'], 'confirmed')
+
+    def test_bulk_attendance_upserts_roster(self):
+        self.attendance.notes = 'Kontuzja kolana'
+        self.attendance.save()
+        new_student = Student.objects.create(
+            user=CustomUser.objects.create_user(email='bulk@example.com', password='pass123'),
+            first_name='Bulk',
+            last_name='Student',
+            email='bulk@example.com',
+            phone_number='987654321',
+            date_of_birth='2000-01-01'
+        )
+        Booking.objects.create(student=new_student, class_model=self.dance_class, status='confirmed')
+        data = {'records': [
+            {'student': self.student.id, 'status': 'late'},
+            {'student': new_student.id, 'status': 'present', 'notes': 'Pierwsze zajęcia'},
+        ]}
+
+        response = self.client.post(f'/api/classes/{self.dance_class.id}/attendance/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(Attendance.objects.filter(class_instance=self.dance_class).count(), 2)
+        self.attendance.refresh_from_db()
+        self.assertEqual((self.attendance.status, self.attendance.notes), ('late', 'Kontuzja kolana'))
+        created = Attendance.objects.get(class_instance=self.dance_class, student=new_student)
+        self.assertTrue(created.is_booked)
+        self.assertEqual(created.notes, 'Pierwsze zajęcia')
+        self.assertEqual(ClassDailyStats.objects.get(class_model=self.dance_class).late, 1)
+
+    def test_bulk_attendance_rejects_unknown_student(self):
+        data = {'records': [
+            {'student': self.student.id, 'status': 'absent'},
+            {'student': 9999, 'status': 'present'},
+        ]}
+        response = self.client.post(f'/api/classes/{self.dance_class.id}/attendance/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.attendance.refresh_from_db()
+        self.assertEqual(self.attendance.status, 'present')
+
+    def test_bulk_attendance_nonexistent_class(self):
+        data = {'records': [{'student': self.student.id, 'status': 'present'}]}
+        response = self.client.post('/api/classes/999/attendance/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_attendance_list_not_modified(self):
+        url = f'/api/classes/{self.dance_class.id}/attendance/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Booking.objects.create(student=self.student, class_model=self.dance_class, status='confirmed')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
 
     def test_create_attendance(self):
         new_student = Student.objects.create(
@@ -893,8 +1441,208 @@ class AttendanceViewTests(APITestCase):
         response = self.client.get('/api/classes/995/attendance/')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_attendance_list_occurrence_filter(self):
+        recurring = Class.objects.create(
+            name='Weekly Class',
+            style='Salsa',
+            max_participants=10,
+            instructor=self.instructor,
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1),
+            days_of_week='MO,TU,WE,TH,FR,SA,SU',
+            is_recurring=True
+        )
+        occurrence = recurring.occurrences.first()
+        Attendance.objects.create(class_instance=recurring, occurrence=occurrence, student=self.student, status='present')
+        url = f'/api/classes/{recurring.id}/attendance/'
+
+        response = self.client.get(url, {'occurrence': occurrence.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.client.get(url, {'occurrence': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+        # Termin innych zajęć
+        response = self.client.get(f'/api/classes/{self.dance_class.id}/attendance/', {'occurrence': occurrence.id})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_attendance_nonexistent_student(self):
         response = self.client.get(
             f'/api/classes/{self.dance_class.id}/attendance/999/'
         )
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExportViewTests(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(email='admin@example.com', password='testpass123', role='admin')
+        user = CustomUser.objects.create_user(email='test@example.com', password='testpass123')
+        self.student = Student.objects.create(
+            user=user,
+            first_name='Test',
+            last_name='Student',
+            email='test@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+        instructor = Instructor.objects.create(
+            first_name='Test',
+            last_name='Instructor',
+            email='instructor@test.com',
+            specialization='Salsa'
+        )
+        self.dance_class = Class.objects.create(
+            name='Export Class',
+            style='Salsa',
+            max_participants=10,
+            instructor=instructor,
+            start_time=timezone.now()
+        )
+        self.booking = Booking.objects.create(student=self.student, class_model=self.dance_class)
+        Attendance.objects.create(class_instance=self.dance_class, student=self.student, status='late')
+        self.payments = [
+            Payment.objects.create(
+                student=self.student, amount=amount, payment_type='single', payment_method='cash'
+            )
+            for amount in (10, 20, 30)
+        ]
+        # Płatność spoza domyślnego okna eksportu
+        Payment.objects.filter(pk=self.payments[0].pk).update(created_at=timezone.now() - timedelta(days=60))
+        self.client.force_authenticate(user=self.admin)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_payments_csv(self):
+        response = self.client.get('/api/exports/payments.csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment;', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(self.read(response))))
+        self.assertEqual(rows[0][:4], ['id', 'created_at', 'student_id', 'student_email'])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [self.payments[1].id, self.payments[2].id])
+        self.assertEqual(rows[1][3], 'test@example.com')
+        self.assertEqual(rows[1][4], '20.00')
+
+    def test_date_window(self):
+        today = timezone.localdate()
+        old_day = today - timedelta(days=60)
+        response = self.client.get(f'/api/exports/payments.csv?from={old_day}&to={old_day}')
+        rows = list(csv.reader(io.StringIO(self.read(response))))
+        self.assertEqual([int(row[0]) for row in rows[1:]], [self.payments[0].id])
+
+        response = self.client.get(f'/api/exports/payments.csv?from={today}&to={old_day}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bookings_and_attendance_ndjson(self):
+        response = self.client.get('/api/exports/bookings.ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['id'], self.booking.id)
+        self.assertEqual(lines[0]['class_model_name'], 'Export Class')
+        self.assertIsNone(lines[0]['occurrence_date'])
+
+        response = self.client.get('/api/exports/attendance.ndjson')
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([line['status'] for line in lines], ['late'])
+
+    def test_unknown_export(self):
+        self.assertEqual(self.client.get('/api/exports/students.csv').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/exports/payments.xml').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(user=self.student.user)
+        response = self.client.get('/api/exports/payments.csv')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CurrentStudentTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='test@example.com', password='testpass123')
+        self.student = Student.objects.create(
+            user=self.user,
+            first_name='Test',
+            last_name='Student',
+            email='test@example.com',
+            phone_number='123456789',
+            date_of_birth='2000-01-01'
+        )
+
+    def student_queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400)
+        return [query['sql'] for query in queries if 'FROM "api_student"' in query['sql']]
+
+    def test_student_id_claim_skips_lookup(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'email': 'test@example.com', 'password': 'testpass123'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.student_queries('get', '/api/bookings/'), [])
+        self.assertEqual(self.student_queries('get', '/api/payments/'), [])
+
+    def test_student_resolved_once_per_request(self):
+        self.client.force_authenticate(user=self.user)
+        queries = self.student_queries('patch', '/api/student/profile/update/', data={'first_name': 'Changed'})
+        self.assertEqual(len(queries), 1)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.first_name, 'Changed')
+
+    def test_student_created_after_token(self):
+        user = CustomUser.objects.create_user(email='late@example.com', password='testpass123')
+        response = self.client.post(reverse('token_obtain_pair'), {'email': 'late@example.com', 'password': 'testpass123'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        Student.objects.create(
+            user=user, first_name='Late', last_name='Student', email='late@example.com',
+            phone_number='123456789', date_of_birth='2000-01-01'
+        )
+        # Token ma student_id = null - profil znajdujemy po użytkowniku
+        response = self.client.get('/api/student/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Late')
+
+    def test_user_without_student(self):
+        admin = CustomUser.objects.create_user(email='admin@example.com', password='testpass123', role='admin')
+        self.client.force_authenticate(user=admin)
+        self.assertEqual(self.client.get('/api/student/profile/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/bookings/').data['results'], [])
+
+
+class StudentImportViewTests(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(email='admin@example.com', password='testpass123', role='admin')
+        self.client.force_authenticate(user=self.admin)
+
+    def upload(self, content):
+        header = 'email,first_name,last_name,phone_number,date_of_birth,password\n'
+        file = SimpleUploadedFile('roster.csv', (header + content).encode(), content_type='text/csv')
+        return self.client.post(reverse('student-import'), {'file': file}, format='multipart')
+
+    def test_import(self):
+        response = self.upload(
+            'ann@school.example,Ann,Nowak,123456789,2010-05-01,\n'
+            'jan@school.example,Jan,Kowalski,987654321,2011-01-01,\n'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 2})
+        self.assertEqual(
+            set(Student.objects.values_list('email', 'user__email')),
+            {('ann@school.example', 'ann@school.example'), ('jan@school.example', 'jan@school.example')}
+        )
+
+    def test_import_reports_invalid_rows(self):
+        response = self.upload(
+            'ann@school.example,Ann,Nowak,123456789,2010-05-01,\n'
+            'admin@example.com,Jan,Kowalski,987654321,2011-01-01,\n'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'], [{'line': 3, 'errors': {'email': ["Email is already in use."]}}])
+        self.assertFalse(Student.objects.exists())
+
+    def test_import_requires_file(self):
+        response = self.client.post(reverse('student-import'), {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_admin_only(self):
+        student_user = CustomUser.objects.create_user(email='student@example.com', password='testpass123')
+        self.client.force_authenticate(user=student_user)
+        response = self.upload('ann@school.example,Ann,Nowak,123456789,2010-05-01,\n')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
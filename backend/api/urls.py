@@ -2,7 +2,9 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import CustomTokenObtainPairView, RegisterUserView, StudentProfileView, StudentProfileUpdateView, \
     AttendanceReportView, ClassAnalyticsView, PaymentListView, PaymentDetailView, PaymentCreateView, PaymentUpdateView, \
-    PaymentDeleteView, SchoolInfoView, SchoolInfoUpdateView, AttendanceListView, AttendanceDetailView
+    PaymentDeleteView, SchoolInfoView, SchoolInfoUpdateView, AttendanceListView, AttendanceDetailView, ScheduleView, \
+    ClassOccurrenceListView, CatalogCacheStatsView, AttendanceBulkView, ExportView, \
+    PasswordHashingStatsView, StudentImportView
 from .views import (
     StudentListView,
     StudentDetailView,
@@ -30,15 +32,21 @@ urlpatterns = [
     path("students/", StudentListView.as_view(), name="student-list"),
     path("students/<int:id>/", StudentDetailView.as_view(), name="student-detail"),
     path("students/create/", StudentCreateView.as_view(), name="student-create"),
+    path("students/import/", StudentImportView.as_view(), name="student-import"),
     path("students/<int:id>/update/", StudentUpdateView.as_view(), name="student-update"),
     path("students/<int:id>/delete/", StudentDeleteView.as_view(), name="student-delete"),
 
     # Endpoints dla Classes
     path("classes/", ClassListView.as_view(), name="class-list"),
     path("classes/<int:id>/", ClassDetailView.as_view(), name="class-detail"),
+    path("classes/cache-stats/", CatalogCacheStatsView.as_view(), name="class-cache-stats"),
     path("classes/create/", ClassCreateView.as_view(), name="class-create"),
     path("classes/<int:id>/update/", ClassUpdateView.as_view(), name="class-update"),
     path("classes/<int:id>/delete/", ClassDeleteView.as_view(), name="class-delete"),
+    path("classes/<int:id>/occurrences/", ClassOccurrenceListView.as_view(), name="class-occurrence-list"),
+
+    # Harmonogram - konkretne terminy zajęć w oknie dat
+    path("schedule/", ScheduleView.as_view(), name="schedule"),
 
     # Endpoints dla Instructors
     path("instructors/", InstructorListView.as_view(), name="instructor-list"),  # /api/instructors/
@@ -57,6 +65,7 @@ urlpatterns = [
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/login/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/register/', RegisterUserView.as_view(), name='register'),
+    path('auth/hashing-stats/', PasswordHashingStatsView.as_view(), name='password-hashing-stats'),
 
     # Student profile endpoints
     path("student/profile/", StudentProfileView.as_view(), name="student-profile"),
@@ -73,12 +82,16 @@ urlpatterns = [
     path('payments/<int:pk>/update/', PaymentUpdateView.as_view(), name='payment-update'),
     path('payments/<int:pk>/delete/', PaymentDeleteView.as_view(), name='payment-delete'),
 
+    # Eksport danych (CSV / NDJSON) - tylko administrator
+    path('exports/<str:resource>.<str:file_format>', ExportView.as_view(), name='export'),
+
     # School info endpoints
     path('school-info/', SchoolInfoView.as_view(), name='school-info'),
     path('school-info/update/', SchoolInfoUpdateView.as_view(), name='school-info-update'),
 
     # Attendance endpoints
     path('classes/<int:class_id>/attendance/', AttendanceListView.as_view(), name='attendance-list'),
+    path('classes/<int:class_id>/attendance/bulk/', AttendanceBulkView.as_view(), name='attendance-bulk'),
     path('classes/<int:class_id>/attendance/<int:student_id>/', AttendanceDetailView.as_view(), name='attendance-detail'),
 ]
 
@@ -1,56 +1,98 @@
+import io
 from datetime import timedelta
 
-from django.db.models import Count, FloatField, F
-from django.db.models.functions import Cast, ExtractHour
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import FloatField, F
+from django.db.models.functions import Cast
 from django.utils import timezone
-from rest_framework.exceptions import NotFound
+from django.utils.dateparse import parse_date
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed, NotFound
 from rest_framework import generics, status, serializers, permissions
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from .models import Student, Instructor, Class, Booking, CustomUser, Payment, SchoolInfo, Attendance
+from .models import Student, Instructor, Class, Booking, CustomUser, Payment, Attendance, ClassFullError, \
+    ClassOccurrence, ClassDailyStats
+from .pagination import IdCursorPagination, CreatedAtCursorPagination, BookingDateCursorPagination, \
+    AttendanceCursorPagination
 from .permissions import IsAdmin
 from .serializers import StudentSerializer, StudentUpdateSerializer, StudentCreateSerializer, InstructorSerializer, \
     InstructorCreateSerializer, InstructorUpdateSerializer, ClassDetailSerializer, ClassCreateSerializer, \
     ClassUpdateSerializer, BookingSerializer, RegisterUserSerializer, CustomTokenObtainPairSerializer, \
-    AttendanceReportSerializer, ClassAnalyticsSerializer, PaymentSerializer, SchoolInfoSerializer, AttendanceSerializer
+    AttendanceReportSerializer, ClassAnalyticsSerializer, PaymentSerializer, SchoolInfoSerializer, AttendanceSerializer, \
+    ScheduleOccurrenceSerializer, ClassOccurrenceSerializer, AttendanceBulkSerializer
+from . import catalog_cache, exports, hashing
+from .admission import AdmissionTimeout, admit_booking
+from .async_views import AsyncAPIViewMixin
+from .analytics import compute_analytics
+from .conditional import ConditionalGetMixin
+from .exceptions import ServiceUnavailable
+from .hashing import HashingSaturated
+from .replica import ReplicaReadMixin
+from .rollups import refresh_class_stats
+from .schedule import expand_schedule, start_of_day
+from .student_import import StudentImportError, import_students
+from .school_info import get_school_info, load_school_info, school_info_etag
 
 
 # Auth (Pierwsza klasa do serializers?????)
 
 
-class CustomTokenObtainPairView(TokenObtainPairView):
+def hashing_unavailable():
+    return ServiceUnavailable(
+        detail="Too many sign-in requests, please try again.",
+        wait=settings.PASSWORD_HASHING_RETRY_AFTER,
+    )
+
+
+class CustomTokenObtainPairView(AsyncAPIViewMixin, TokenObtainPairView):
+    """
+    POST: Tokeny i dane profilu (email, firstName, lastName, role).
+    Hasło sprawdzane w puli api.hashing - przy pełnej kolejce 503 z Retry-After.
+    """
     serializer_class = CustomTokenObtainPairSerializer
 
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        email = request.data.get("email")
-        user = CustomUser.objects.filter(email=email).first()
-
-        if user:
-            # Changed to match frontend expectations
-            user_data = {
-                "email": user.email,  # Add email
-                "firstName": user.first_name,
-                "lastName": user.last_name,
-                "role": user.role,
-            }
-            response.data.update(user_data)
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        # Tylko walidacja pól - uwierzytelnienie z validate() robimy asynchronicznie
+        attrs = serializer.to_internal_value(request.data)
+        try:
+            user = await hashing.authenticate(attrs[serializer.username_field], attrs['password'])
+        except HashingSaturated:
+            raise hashing_unavailable()
+        if user is None:
+            raise AuthenticationFailed(serializer.error_messages['no_active_account'], 'no_active_account')
 
-        return response
+        refresh = serializer.get_token(user)
+        return Response({
+            "refresh": str(refresh),
+            "access": str(refresh.access_token),
+            **serializer.profile_data(user),
+        })
 
 
-class RegisterUserView(generics.CreateAPIView):
+class RegisterUserView(AsyncAPIViewMixin, generics.CreateAPIView):
+    """
+    POST: Rejestracja studenta; hasło hashowane w puli api.hashing jak przy logowaniu
+    """
     queryset = CustomUser.objects.all()
     serializer_class = RegisterUserSerializer
     permission_classes = []
 
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        try:
+            password_hash = await hashing.hash_password(serializer.validated_data['password'])
+        except HashingSaturated:
+            raise hashing_unavailable()
+        user = await sync_to_async(serializer.save)(password_hash=password_hash)
         return Response({
             "user": {
                 "email": user.email,
@@ -66,6 +108,16 @@ class RegisterUserView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class PasswordHashingStatsView(generics.GenericAPIView):
+    """
+    GET: Queue depth and counters of the password hashing pool (this process)
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(hashing.password_hashing.stats())
+
+
 class StudentDeleteView(generics.DestroyAPIView):
     model = Student
 
@@ -79,6 +131,7 @@ class StudentDeleteView(generics.DestroyAPIView):
 class StudentListView(generics.ListAPIView):
     model = Student
     serializer_class = StudentSerializer
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
         # Możesz dodać tutaj filtrowanie
@@ -91,11 +144,11 @@ class StudentUpdateView(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        # Pobieramy studenta powiązanego z użytkownikiem (używamy usera zalogowanego w request)
-        try:
-            return Student.objects.get(user=self.request.user)  # Powiązany student z zalogowanym użytkownikiem
-        except Student.DoesNotExist:
+        # Student powiązany z zalogowanym użytkownikiem (api.middleware.CurrentStudent)
+        student = self.request.current_student.instance
+        if student is None:
             raise NotFound(detail="Student not found.")
+        return student
 
 
 class StudentCreateView(generics.CreateAPIView):
@@ -107,6 +160,27 @@ class StudentCreateView(generics.CreateAPIView):
         serializer.save(user=user)
 
 
+class StudentImportView(generics.GenericAPIView):
+    """
+    POST: Bulk import of students from an uploaded CSV file (multipart field "file").
+    All rows are validated first - any error rejects the whole file.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise serializers.ValidationError({"file": ["This field is required."]})
+        try:
+            created = import_students(io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''))
+        except UnicodeDecodeError:
+            raise serializers.ValidationError({"file": ["File must be UTF-8 encoded CSV."]})
+        except StudentImportError as exc:
+            return Response({"errors": exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"created": created}, status=status.HTTP_201_CREATED)
+
+
 class StudentDetailView(generics.RetrieveAPIView):
     model = Student
     serializer_class = StudentSerializer
@@ -124,12 +198,10 @@ class StudentProfileView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        try:
-            student = Student.objects.get(user=request.user)
-            serializer = StudentSerializer(student)
-            return Response(serializer.data)
-        except Student.DoesNotExist:
+        student = request.current_student.instance
+        if student is None:
             raise NotFound(detail="Student not found.")
+        return Response(StudentSerializer(student).data)
 
 
 class StudentProfileUpdateView(generics.UpdateAPIView):
@@ -139,10 +211,10 @@ class StudentProfileUpdateView(generics.UpdateAPIView):
 
     def get_object(self):
         """ Pobiera studenta powiązanego z użytkownikiem """
-        try:
-            return Student.objects.get(user=self.request.user)
-        except Student.DoesNotExist:
+        student = self.request.current_student.instance
+        if student is None:
             raise NotFound(detail="Student not found.")
+        return student
 
 
 class InstructorListView(generics.ListAPIView):
@@ -151,6 +223,7 @@ class InstructorListView(generics.ListAPIView):
     serializer_class = InstructorSerializer
     permission_classes = [IsAuthenticated,
                           IsAdmin]  # Add permissions  class InstructorDetailView(generics.RetrieveAPIView): queryset = Instructor.objects.all() serializer_class = InstructorSerializer
+    pagination_class = IdCursorPagination
 
     def get_object(self):
         try:
@@ -200,30 +273,162 @@ class InstructorDeleteView(generics.DestroyAPIView):
             raise NotFound(detail="Instructor not found.")
 
 
-class ClassListView(generics.ListAPIView):
+class ClassListView(ReplicaReadMixin, ConditionalGetMixin, generics.ListAPIView):
     model = Class
     serializer_class = ClassDetailSerializer
     permission_classes = []  # Allow unauthenticated access
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
-        queryset = Class.objects.all()
+        queryset = Class.objects.catalog()
         style = self.request.query_params.get("style", None)
         if style:
             queryset = queryset.filter(style__icontains=style)
         return queryset
 
+    def get_validators(self):
+        return catalog_cache.cached_validators(self.cache_key, super().get_validators)
+
+    def list(self, request, *args, **kwargs):
+        return catalog_cache.cached_response(
+            self.cache_key,
+            lambda: super(ClassListView, self).list(request, *args, **kwargs),
+        )
+
+    @cached_property
+    def cache_key(self):
+        return catalog_cache.list_key(self.request)
+
 
-class ClassDetailView(generics.RetrieveAPIView):
+class ClassDetailView(ReplicaReadMixin, ConditionalGetMixin, generics.RetrieveAPIView):
     model = Class
     serializer_class = ClassDetailSerializer
     permission_classes = []  # Allow unauthenticated access
 
     def get_object(self):
         try:
-            return Class.objects.get(pk=self.kwargs["id"])
+            return Class.objects.catalog().get(pk=self.kwargs["id"])
         except Class.DoesNotExist:
             raise NotFound(detail="Class not found.")
 
+    def get_freshness_querysets(self):
+        return [(Class.objects.filter(pk=self.kwargs["id"]), self.freshness_fields)]
+
+    def get_validators(self):
+        return catalog_cache.cached_validators(self.cache_key, super().get_validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        return catalog_cache.cached_response(
+            self.cache_key,
+            lambda: super(ClassDetailView, self).retrieve(request, *args, **kwargs),
+        )
+
+    @cached_property
+    def cache_key(self):
+        return catalog_cache.detail_key(self.kwargs["id"])
+
+
+class CatalogCacheStatsView(generics.GenericAPIView):
+    """
+    GET: Hit/miss counters of the public class catalog cache (this process)
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(catalog_cache.stats())
+
+
+class DateWindowMixin:
+    """
+    Mixin odczytujący okno dat z parametrów ?from=YYYY-MM-DD&to=YYYY-MM-DD
+    """
+    default_window_days = 7
+    max_window_days = 92
+
+    def parse_day(self, name, default=None):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise serializers.ValidationError({name: "Invalid date, expected YYYY-MM-DD."})
+        return day
+
+    def get_window(self):
+        date_from = self.parse_day("from", default=timezone.localdate())
+        date_to = self.parse_day("to", default=date_from + timedelta(days=self.default_window_days - 1))
+        if date_to < date_from:
+            raise serializers.ValidationError({"to": "Must not be earlier than 'from'."})
+        if (date_to - date_from).days >= self.max_window_days:
+            raise serializers.ValidationError(f"Date window cannot exceed {self.max_window_days} days.")
+        return date_from, date_to
+
+
+class ScheduleView(ReplicaReadMixin, DateWindowMixin, generics.ListAPIView):
+    """
+    GET: Returns concrete class occurrences for a date window (?from=YYYY-MM-DD&to=YYYY-MM-DD)
+    """
+    serializer_class = ScheduleOccurrenceSerializer
+    permission_classes = []  # Allow unauthenticated access
+
+    def get_queryset(self):
+        date_from, date_to = self.get_window()
+        queryset = Class.objects.catalog()
+        style = self.request.query_params.get("style", None)
+        if style:
+            queryset = queryset.filter(style__icontains=style)
+
+        expanded = expand_schedule(queryset, date_from, date_to)
+
+        # Wygenerowane już terminy (ClassOccurrence) - jedno zapytanie po indeksie (zajęcia, data)
+        materialized = {
+            (occurrence.class_model_id, occurrence.date): occurrence
+            for occurrence in ClassOccurrence.objects.filter(
+                class_model__in={class_instance.id for class_instance, _ in expanded},
+                date__range=(date_from, date_to),
+            )
+        }
+
+        items = []
+        for class_instance, occurrence in expanded:
+            stored = materialized.get((class_instance.id, timezone.localtime(occurrence.start).date()))
+            if stored is not None:
+                stored.class_model = class_instance
+            items.append({
+                "class_id": class_instance.id,
+                "occurrence_id": stored.id if stored else None,
+                "name": class_instance.name,
+                "style": class_instance.style,
+                "instructor": f"{class_instance.instructor.first_name} {class_instance.instructor.last_name}",
+                "room": class_instance.room,
+                "start": occurrence.start,
+                "end": occurrence.end,
+                "available_slots": stored.available_slots() if stored else class_instance.available_slots(),
+            })
+        return items
+
+
+class ClassOccurrenceListView(ReplicaReadMixin, DateWindowMixin, generics.ListAPIView):
+    """
+    GET: Returns materialized occurrences of a class with per-session free slots
+    """
+    serializer_class = ClassOccurrenceSerializer
+    permission_classes = []  # Allow unauthenticated access
+    default_window_days = 28
+
+    def get_queryset(self):
+        date_from, date_to = self.get_window()
+        if not Class.objects.filter(id=self.kwargs["id"]).exists():
+            raise NotFound(detail="Class not found.")
+        return (
+            ClassOccurrence.objects
+            .filter(class_model_id=self.kwargs["id"], date__range=(date_from, date_to))
+            .select_related('class_model')
+        )
+
 
 class ClassCreateView(generics.CreateAPIView):
     model = Class
@@ -258,23 +463,24 @@ class ClassDeleteView(generics.DestroyAPIView):
             raise NotFound(detail="Class not found.")
 
 
-class BookingListView(generics.ListAPIView):
+class BookingListView(ConditionalGetMixin, generics.ListAPIView):
     """
     GET: Returns list of bookings for logged in user.
     """
     model = Booking
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = BookingDateCursorPagination
+    freshness_fields = ('updated_at', 'class_model__updated_at')
 
     def get_queryset(self):
         """
         Filter bookings for currently logged in user's student profile
         """
-        try:
-            student = Student.objects.get(user=self.request.user)
-            return Booking.objects.filter(student=student)
-        except Student.DoesNotExist:
+        student_id = self.request.current_student.id
+        if student_id is None:
             return Booking.objects.none()
+        return Booking.objects.filter(student_id=student_id).select_related('class_model__instructor')
 
 
 class BookingCreateView(generics.CreateAPIView):
@@ -286,18 +492,34 @@ class BookingCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        try:
-            student = Student.objects.get(user=self.request.user)
-            class_instance = serializer.validated_data["class_model"]
-
-            # Check if spots available
-            if class_instance.bookings.filter(status="confirmed").count() >= class_instance.max_participants:
-                raise serializers.ValidationError("No spots available for this class.")
+        student = self.request.current_student.instance
+        if student is None:
+            raise serializers.ValidationError("Student profile not found.")
 
-            # Create booking
+        # Zapisy na te same zajęcia przechodzą przez kolejkę przyjęć (api.admission)
+        try:
+            admit_booking(serializer.validated_data['class_model'].pk, lambda: self.save_booking(serializer, student))
+        except AdmissionTimeout:
+            raise ServiceUnavailable(detail="Too many booking requests, please try again.")
+
+    def save_booking(self, serializer, student):
+        occurrence = serializer.validated_data.get('occurrence')
+        bookings = Booking.objects.filter(student=student, class_model=serializer.validated_data['class_model'])
+        if bookings.filter(occurrence_key=occurrence.pk if occurrence else 0).exists():
+            raise serializers.ValidationError("You have already booked this class.")
+        # Rezerwacja całego cyklu obejmuje każdy termin - nie łączymy jej z rezerwacjami terminów,
+        # inaczej jedna osoba zajmowałaby w terminie dwa miejsca
+        if bookings.filter(status__in=['confirmed', 'waiting'], occurrence__isnull=occurrence is not None).exists():
+            if occurrence is not None:
+                raise serializers.ValidationError("You have already booked the whole class series.")
+            raise serializers.ValidationError("You have already booked single sessions of this class.")
+
+        # Create booking - the slot is taken atomically together with the insert
+        try:
             serializer.save(student=student)
-        except Student.DoesNotExist:
-            raise serializers.ValidationError("Student profile not found.")
+        except ClassFullError:
+            # Ostatnie miejsce zajął ktoś inny w międzyczasie - zapis na listę oczekujących
+            serializer.save(student=student, status='waiting')
 
 
 class BookingDetailView(generics.RetrieveAPIView):
@@ -312,11 +534,10 @@ class BookingDetailView(generics.RetrieveAPIView):
         """
         Filter bookings for currently logged in user's student profile
         """
-        try:
-            student = Student.objects.get(user=self.request.user)
-            return Booking.objects.filter(student=student)
-        except Student.DoesNotExist:
+        student_id = self.request.current_student.id
+        if student_id is None:
             return Booking.objects.none()
+        return Booking.objects.filter(student_id=student_id).select_related('class_model__instructor')
 
 
 class BookingDeleteView(generics.DestroyAPIView):
@@ -328,11 +549,10 @@ class BookingDeleteView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        try:
-            student = Student.objects.get(user=self.request.user)
-            return Booking.objects.filter(student=student)
-        except Student.DoesNotExist:
+        student_id = self.request.current_student.id
+        if student_id is None:
             return Booking.objects.none()
+        return Booking.objects.filter(student_id=student_id).select_related('class_model__instructor')
 
     def perform_destroy(self, instance):
         instance.status = "cancelled"
@@ -341,7 +561,16 @@ class BookingDeleteView(generics.DestroyAPIView):
 
 # Reports
 
-class AttendanceReportView(generics.ListAPIView):
+def report_stats(period, default_days, **periods):
+    """ Agregaty dzienne (ClassDailyStats) dla okresu z URL-a, np. week=7 - od początku dnia do teraz """
+    now = timezone.now()
+    end_date = timezone.localdate(now)
+    start_date = end_date - timedelta(days=periods.get(period, default_days))
+    # Okno kończy się teraz - dzisiejsze zajęcia, które jeszcze się nie zaczęły, nie trafiają do raportu
+    return ClassDailyStats.objects.filter(day__range=(start_date, end_date), class_model__start_time__lte=now)
+
+
+class AttendanceReportView(ReplicaReadMixin, generics.ListAPIView):
     """
     GET: Returns attendance statistics for classes
     """
@@ -349,42 +578,25 @@ class AttendanceReportView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get_queryset(self):
-        period = self.kwargs.get('period', 'month')
-        end_date = timezone.now()
-
-        if period == 'week':
-            start_date = end_date - timedelta(days=7)
-        elif period == 'month':
-            start_date = end_date - timedelta(days=30)
-        else:  # quarter
-            start_date = end_date - timedelta(days=90)
+        stats = report_stats(self.kwargs.get('period', 'month'), 90, week=7, month=30)
 
+        # Czytamy tylko dzienne agregaty (ClassDailyStats) - koszt zależy od liczby zajęć w oknie
         return (
-            Booking.objects
-            .filter(class_model__start_time__range=(start_date, end_date))
+            stats
+            .filter(bookings__gt=0)
             .values(
-                'class_model__name',
-                'class_model__instructor__first_name',
-                'class_model__instructor__last_name',
-                'class_model__start_time',
-                'class_model__max_participants'
-            )
-            .annotate(
                 class_name=F('class_model__name'),
-                instructor_name=F('class_model__instructor__first_name'),
+                instructor_name=F('instructor__first_name'),
                 date=F('class_model__start_time'),
-                booked_slots=Count('id'),
-                max_slots=F('class_model__max_participants'),
-                attendance_rate=Cast(
-                    Count('id') * 100.0 / F('class_model__max_participants'),
-                    FloatField()
-                )
+                booked_slots=F('bookings'),
+                max_slots=F('max_participants'),
+                attendance_rate=Cast(F('bookings') * 100.0 / F('max_participants'), FloatField()),
             )
-            .order_by('-class_model__start_time')
+            .order_by('-date')
         )
 
 
-class ClassAnalyticsView(generics.RetrieveAPIView):
+class ClassAnalyticsView(ReplicaReadMixin, generics.RetrieveAPIView):
     """
     GET: Returns analytics data for classes
     """
@@ -392,55 +604,90 @@ class ClassAnalyticsView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get_object(self):
-        period = self.kwargs.get('period', 'month')
-        end_date = timezone.now()
-
-        if period == 'month':
-            start_date = end_date - timedelta(days=30)
-        elif period == 'quarter':
-            start_date = end_date - timedelta(days=90)
-        else:  # year
-            start_date = end_date - timedelta(days=365)
-
-        # Popular classes
-        popular_classes = (
-            Class.objects
-            .filter(start_time__range=(start_date, end_date))
-            .annotate(booking_count=Count('bookings'))
-            .values('name', 'booking_count')
-            .order_by('-booking_count')[:5]
-        )
+        stats = report_stats(self.kwargs.get('period', 'month'), 365, month=30, quarter=90)
+        dimensions = [
+            name.strip() for name in self.request.query_params.get('dimensions', '').split(',') if name.strip()
+        ]
+        try:
+            return compute_analytics(stats, dimensions)
+        except ValueError as exc:
+            raise serializers.ValidationError({'dimensions': str(exc)})
 
-        # Peak hours
-        peak_hours = (
-            Class.objects
-            .filter(start_time__range=(start_date, end_date))
-            .annotate(hour=ExtractHour('start_time'))
-            .values('hour')
-            .annotate(class_count=Count('id'))
-            .order_by('hour')
-        )
 
-        # Style distribution
-        style_distribution = (
-            Class.objects
-            .filter(start_time__range=(start_date, end_date))
-            .values('style')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
+class PaymentListView(ReplicaReadMixin, ConditionalGetMixin, DateWindowMixin, generics.ListAPIView):
+    """
+    GET: Returns the requesting student's payments. Admins get all payments and may filter with
+    ?status=&payment_type=&payment_method=&student=<id>&from=YYYY-MM-DD&to=YYYY-MM-DD
+    """
+    serializer_class = PaymentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+    choice_filters = {
+        'status': Payment.PAYMENT_STATUS,
+        'payment_type': Payment.PAYMENT_TYPE,
+        'payment_method': Payment.PAYMENT_METHOD,
+    }
 
-        return {
-            'popular_classes': popular_classes,
-            'peak_hours': peak_hours,
-            'style_distribution': style_distribution
-        }
+    def get_queryset(self):
+        if not IsAdmin().has_permission(self.request, self):
+            # Zakres indeksu (student, created_at, id) - tylko płatności zalogowanego studenta
+            student_id = self.request.current_student.id
+            if student_id is None:
+                return Payment.objects.none()
+            return Payment.objects.filter(student_id=student_id)
+        return self.filter_payments(Payment.objects.all())
+
+    def filter_payments(self, queryset):
+        params = self.request.query_params
+        for name, choices in self.choice_filters.items():
+            value = params.get(name)
+            if not value:
+                continue
+            allowed = [choice for choice, _ in choices]
+            if value not in allowed:
+                raise serializers.ValidationError({name: f"Invalid value, expected one of: {', '.join(allowed)}."})
+            queryset = queryset.filter(**{name: value})
+
+        student = params.get('student')
+        if student:
+            if not student.isdigit():
+                raise serializers.ValidationError({'student': "Invalid student id."})
+            queryset = queryset.filter(student_id=int(student))
+
+        # Granice dnia jako zakres created_at - filtr po __date nie skorzystałby z indeksu
+        date_from = self.parse_day('from')
+        date_to = self.parse_day('to')
+        if date_from:
+            queryset = queryset.filter(created_at__gte=start_of_day(date_from))
+        if date_to:
+            queryset = queryset.filter(created_at__lt=start_of_day(date_to + timedelta(days=1)))
+        return queryset
 
 
-class PaymentListView(generics.ListAPIView):
-    queryset = Payment.objects.all()
-    serializer_class = PaymentSerializer
-    permission_classes = [permissions.IsAuthenticated]
+class ExportView(ReplicaReadMixin, DateWindowMixin, generics.GenericAPIView):
+    """
+    GET: Streams payments, bookings or attendance from a date window as CSV or NDJSON
+    (/api/exports/<resource>.<csv|ndjson>?from=YYYY-MM-DD&to=YYYY-MM-DD, default: last 31 days)
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    default_window_days = 31
+    max_window_days = 366
+
+    def get_window(self):
+        # Eksport dotyczy przeszłości - okno domyślnie kończy się dzisiaj
+        date_to = self.parse_day("to", default=timezone.localdate())
+        date_from = self.parse_day("from", default=date_to - timedelta(days=self.default_window_days - 1))
+        if date_to < date_from:
+            raise serializers.ValidationError({"to": "Must not be earlier than 'from'."})
+        if (date_to - date_from).days >= self.max_window_days:
+            raise serializers.ValidationError(f"Date window cannot exceed {self.max_window_days} days.")
+        return date_from, date_to
+
+    def get(self, request, resource, file_format):
+        if resource not in exports.EXPORTS or file_format not in exports.FORMATS:
+            raise NotFound(detail="Export not found.")
+        date_from, date_to = self.get_window()
+        return exports.export_response(resource, file_format, date_from, date_to)
 
 
 class PaymentDetailView(generics.RetrieveAPIView):
@@ -473,29 +720,22 @@ class SchoolInfoMixin:
     """
 
     def get_object(self):
-        school_info = SchoolInfo.objects.first()
-        if not school_info:
-            # Create default SchoolInfo if none exists
-            school_info = SchoolInfo.objects.create(
-                name="Szkoła Tańca",
-                address="Ulica przykładowa 1",
-                phone="000000000",
-                email="kontakt@szkola.pl",
-                bank_name="Bank",
-                bank_account="00 0000 0000 0000 0000 0000 0000",
-                bank_recipient="Szkoła Tańca",
-                transfer_title_prefix="Płatność - "
-            )
-        return school_info
+        return load_school_info()
 
 
-class SchoolInfoView(SchoolInfoMixin, generics.RetrieveAPIView):
+class SchoolInfoView(ConditionalGetMixin, generics.RetrieveAPIView):
     """
     GET: Returns the school information
     """
     serializer_class = SchoolInfoSerializer
     permission_classes = []  # Allow public access
 
+    def get_object(self):
+        return get_school_info()
+
+    def get_validators(self):
+        return school_info_etag(get_school_info()), None
+
 
 class SchoolInfoUpdateView(SchoolInfoMixin, generics.UpdateAPIView):
     """
@@ -505,17 +745,49 @@ class SchoolInfoUpdateView(SchoolInfoMixin, generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
 
 
-class AttendanceListView(generics.ListCreateAPIView):
+class AttendanceListView(ConditionalGetMixin, generics.ListCreateAPIView):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AttendanceCursorPagination
+    freshness_fields = ('updated_at', 'student__updated_at')
+
+    def get_freshness_querysets(self):
+        # booking_status zależy od rezerwacji na te zajęcia
+        bookings = Booking.objects.filter(class_model_id=self.kwargs['class_id'])
+        return super().get_freshness_querysets() + [(bookings, ('updated_at',))]
 
     def get_queryset(self):
         class_id = self.kwargs['class_id']
         # First verify class exists
         if not Class.objects.filter(id=class_id).exists():
             raise NotFound(detail="Class not found.")
-        return Attendance.objects.filter(class_instance_id=class_id)
+        queryset = Attendance.objects.filter(class_instance_id=class_id).select_related('student')
+        if self.occurrence_id is not None:
+            queryset = queryset.filter(occurrence_id=self.occurrence_id)
+        return queryset
+
+    @cached_property
+    def occurrence_id(self):
+        # ?occurrence=<id> zawęża listę do terminu zajęć cyklicznych - tych zajęć
+        occurrence = self.request.query_params.get('occurrence')
+        if not occurrence:
+            return None
+        if not occurrence.isdigit():
+            raise serializers.ValidationError({"occurrence": ["A valid integer is required."]})
+        if not ClassOccurrence.objects.filter(pk=occurrence, class_model_id=self.kwargs['class_id']).exists():
+            raise NotFound(detail="Occurrence not found.")
+        return int(occurrence)
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args:
+            # Lista obecności: statusy rezerwacji całej strony jednym zapytaniem zamiast jednego na wiersz
+            page = list(args[0])
+            context = self.get_serializer_context()
+            context['booking_statuses'] = AttendanceSerializer.booking_statuses(self.kwargs['class_id'], page)
+            kwargs['context'] = context
+            args = (page,) + args[1:]
+        return super().get_serializer(*args, **kwargs)
 
     def perform_create(self, serializer):
         class_id = self.kwargs['class_id']
@@ -526,6 +798,33 @@ class AttendanceListView(generics.ListCreateAPIView):
             raise NotFound(detail="Class not found.")
 
 
+class AttendanceBulkView(generics.GenericAPIView):
+    """
+    POST: Sets attendance for the whole roster of a class in one transaction
+    """
+    serializer_class = AttendanceBulkSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, class_id):
+        try:
+            class_instance = Class.objects.get(id=class_id)
+        except Class.DoesNotExist:
+            raise NotFound(detail="Class not found.")
+
+        serializer = self.get_serializer(data=request.data, context={
+            **self.get_serializer_context(), 'class_instance': class_instance
+        })
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            attendances = list(serializer.save())
+            # bulk_create pomija sygnały - agregaty raportów odświeżamy sami
+            refresh_class_stats(class_instance.pk)
+
+        context = self.get_serializer_context()
+        context['booking_statuses'] = AttendanceSerializer.booking_statuses(class_instance.pk, attendances)
+        return Response(AttendanceSerializer(attendances, many=True, context=context).data)
+
+
 class AttendanceDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
@@ -534,10 +833,15 @@ class AttendanceDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_object(self):
         class_id = self.kwargs['class_id']
         student_id = self.kwargs['student_id']
+        # ?occurrence=<id> wskazuje obecność na konkretnym terminie zajęć cyklicznych
+        occurrence = self.request.query_params.get('occurrence', '0')
+        if not occurrence.isdigit():
+            raise NotFound(detail="Attendance record not found.")
         try:
             return Attendance.objects.get(
                 class_instance_id=class_id,
-                student_id=student_id
+                student_id=student_id,
+                occurrence_key=int(occurrence)
             )
         except Attendance.DoesNotExist:
             raise NotFound(detail="Attendance record not found.")
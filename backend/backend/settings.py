@@ -53,6 +53,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReadYourWritesMiddleware',
+    'api.middleware.CurrentStudentMiddleware',
 ]
 
 CORS_ALLOWED_ORIGINS = [
@@ -83,12 +85,53 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Profil produkcyjny SQLite - pragmy wykonywane przy każdym otwarciu połączenia
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # czytelnicy nie są blokowani przez zapis
+    'synchronous': 'NORMAL',  # w trybie WAL bezpieczne, fsync dopiero przy checkpoincie
+    'busy_timeout': 5000,  # ms oczekiwania na blokadę zamiast "database is locked"
+    'cache_size': -20000,  # ujemna wartość = KiB, ok. 20 MB cache stron na połączenie
+    'mmap_size': 134217728,  # 128 MB odczytów przez mmap
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # blokada zapisu na starcie transakcji - bez SQLITE_BUSY przy podnoszeniu blokady w WAL
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # połączenia utrzymywane między żądaniami, sprawdzane przed ponownym użyciem
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Drugie połączenie do tego samego pliku tylko do odczytu (api.replica) - listy i raporty
+    # nie zajmują połączenia zapisującego; można tu podać prawdziwą replikę
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"{(BASE_DIR / 'db.sqlite3').as_uri()}?mode=ro",
+        'OPTIONS': {
+            # journal_mode ustawia połączenie zapisujące - tryb WAL jest zapisany w pliku bazy
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items() if name != 'journal_mode'
+            ),
+        },
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+
+DATABASE_ROUTERS = ['api.replica.ReplicaRouter']
+REPLICA_DATABASE_ALIAS = 'replica'
+# Przez tyle sekund po zapisie odczyty użytkownika idą do default (read-your-writes)
+REPLICA_READ_YOUR_WRITES_WINDOW = 5
+# Znacznik zapisu musi widzieć każdy worker - przy kilku procesach i prawdziwej replice
+# alias musi wskazywać współdzielony cache (replika 'replica' to ten sam plik, bez opóźnień)
+REPLICA_STATE_CACHE_ALIAS = 'default'
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.postgresql',
@@ -101,6 +144,65 @@ DATABASES = {
 # }
 
 
+# Cache (api.catalog_cache, api.authentication, api.replica). LocMemCache jest osobny w każdym
+# procesie - unieważnienie przy zapisie nie dociera do innych workerów, więc wpisy katalogu
+# i stanu użytkownika żyją wtedy najwyżej *_LOCAL_TIMEOUT/*_LOCAL_TTL sekund (api.caching).
+# Przy kilku workerach należy skonfigurować współdzielony backend, np.:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': 'redis://127.0.0.1:6379',
+#     }
+# }
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cache danych szkoły (api.school_info): lokalny w procesie + opcjonalnie współdzielony
+# alias z CACHES (np. Redis/Memcached) - None oznacza tylko warstwę lokalną
+SCHOOL_INFO_CACHE_ALIAS = None
+SCHOOL_INFO_LOCAL_TTL = 60  # sekundy
+SCHOOL_INFO_SHARED_TTL = None  # bez wygasania - unieważniane przy zapisie
+
+# Cache publicznego katalogu zajęć (api.catalog_cache) - unieważniany sygnałami.
+# TTL to tylko zabezpieczenie przed zmianami z pominięciem ORM. Unieważnienie widzą
+# wszystkie workery tylko przy współdzielonym CATALOG_CACHE_ALIAS - w cache lokalnym
+# dla procesu wolne miejsca mogą być nieaktualne przez CATALOG_CACHE_LOCAL_TIMEOUT
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 300  # sekundy
+CATALOG_CACHE_LOCAL_TIMEOUT = 5  # sekundy, gdy CATALOG_CACHE_ALIAS to LocMemCache
+
+# Kolejka przyjmowania rezerwacji (api.admission): jeden wątek zapisujący na proces,
+# zgłoszenia tych samych zajęć łączone w transakcje po BOOKING_ADMISSION_BATCH_SIZE
+BOOKING_ADMISSION_QUEUE = True
+BOOKING_ADMISSION_BATCH_SIZE = 20
+BOOKING_ADMISSION_TIMEOUT = 10  # sekundy oczekiwania na wynik
+
+# Hashowanie haseł przy logowaniu i rejestracji (api.hashing): pula wątków i kolejka
+# oczekujących - gdy obie są pełne, endpointy odpowiadają 503 z Retry-After
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_QUEUE_SIZE = 16
+PASSWORD_HASHING_RETRY_AFTER = 2  # sekundy
+# Wątki serwera WSGI obsługujące żądania w jednym procesie (np. gunicorn --threads 8).
+# Pod WSGI logowanie czekające na hash blokuje wątek serwera, więc 503 zwracane jest już
+# przy połowie z nich zajętych hashowaniem - reszta obsługuje inne endpointy. None pod ASGI.
+WSGI_REQUEST_THREADS = 8
+
+# Import studentów z CSV (api.student_import): wiersze wstawiane porcjami po
+# STUDENT_IMPORT_CHUNK_SIZE, hasła hashowane w STUDENT_IMPORT_PROCESSES procesach (None = wszystkie CPU)
+STUDENT_IMPORT_CHUNK_SIZE = 500
+STUDENT_IMPORT_PROCESSES = None
+
+# Stan użytkownika (is_active, role) dla api.authentication - tokeny dezaktywowanych
+# użytkowników lub ze zmienioną rolą są odrzucane najpóźniej po AUTH_STATE_CACHE_TTL
+# (przy kilku workerach alias musi wskazywać współdzielony cache - sygnał czyści tylko bieżący proces)
+AUTH_STATE_CACHE_ALIAS = 'default'
+AUTH_STATE_CACHE_TTL = 30  # sekundy
+AUTH_STATE_CACHE_LOCAL_TTL = 5  # sekundy, gdy AUTH_STATE_CACHE_ALIAS to LocMemCache
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -154,7 +256,8 @@ REST_FRAMEWORK = {
     #     'rest_framework.permissions.AllowAny',  # Umożliwia dostęp dla wszystkich
     # ]
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT z claimami role/student_id - bez wczytywania użytkownika przy każdym żądaniu
+        'api.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
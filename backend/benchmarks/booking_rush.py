@@ -0,0 +1,117 @@
+"""
+Benchmark: wiele jednoczesnych POST /api/bookings/create/ na te same zajęcia (SQLite).
+
+Porównuje zapis bezpośredni z wątków żądań z kolejką przyjmowania (api.admission).
+Działa na tymczasowej kopii schematu - nie dotyka db.sqlite3.
+
+    cd backend && python -m benchmarks.booking_rush --requests 50 --capacity 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+
+def setup_django(database_path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = database_path
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def create_students(count, prefix):
+    from api.models import CustomUser, Student
+
+    users = CustomUser.objects.bulk_create([
+        CustomUser(email=f'{prefix}{i}@bench.local', password='!') for i in range(count)
+    ])
+    Student.objects.bulk_create([
+        Student(
+            user=user, first_name='Bench', last_name=str(i), email=user.email,
+            phone_number='000000000', date_of_birth='2000-01-01',
+        )
+        for i, user in enumerate(users)
+    ])
+    return list(CustomUser.objects.filter(email__startswith=prefix).order_by('id'))
+
+
+def rush(mode, requests, capacity):
+    from django.conf import settings
+    from django.db import connection
+    from django.utils import timezone
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from api.middleware import CurrentStudentMiddleware
+    from api.models import Booking, Class, Instructor
+    from api.views import BookingCreateView
+
+    settings.BOOKING_ADMISSION_QUEUE = mode == 'queue'
+    instructor = Instructor.objects.create(first_name='Bench', last_name=mode, email=f'{mode}@bench.local')
+    dance_class = Class.objects.create(
+        name=f'Rush {mode}', style='Salsa', max_participants=capacity,
+        instructor=instructor, start_time=timezone.now(),
+    )
+    users = create_students(requests, prefix=f'{mode}-')
+
+    factory = APIRequestFactory()
+    view = CurrentStudentMiddleware(BookingCreateView.as_view())
+    barrier = threading.Barrier(requests)
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def client(user):
+        request = factory.post('/api/bookings/create/', {'class_model': dance_class.pk}, format='json')
+        force_authenticate(request, user=user)
+        barrier.wait()
+        try:
+            response = view(request)
+            outcome = response.data.get('status', str(response.status_code)) if response.status_code == 201 \
+                else str(response.status_code)
+        except Exception as exc:
+            outcome = type(exc).__name__
+        finally:
+            connection.close()
+        with lock:
+            outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=client, args=(user,)) for user in users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    confirmed = Booking.objects.filter(class_model=dance_class, status='confirmed').count()
+    return elapsed, outcomes, confirmed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50, help="Concurrent booking requests per run")
+    parser.add_argument('--capacity', type=int, default=20, help="Class capacity")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'bench.sqlite3'))
+        print(f"{args.requests} concurrent bookings, capacity {args.capacity}")
+        print(f"{'mode':<8}{'time [s]':>10}{'req/s':>10}{'confirmed':>11}  outcomes")
+        for mode in ('direct', 'queue'):
+            elapsed, outcomes, confirmed = rush(mode, args.requests, args.capacity)
+            overbooked = ' OVERBOOKED' if confirmed > args.capacity else ''
+            print(
+                f"{mode:<8}{elapsed:>10.3f}{args.requests / elapsed:>10.1f}{confirmed:>11}  "
+                f"{dict(outcomes)}{overbooked}"
+            )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
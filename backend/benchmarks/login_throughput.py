@@ -0,0 +1,133 @@
+"""
+Benchmark: przepustowość POST /api/auth/login/ ze skonfigurowanym hasherem haseł.
+
+Dla każdej liczby wątków loguje kolejno użytkowników testowych i podaje logowania/s,
+liczbę zapytań SQL na logowanie oraz czas samego sprawdzenia hasła - pokazuje, jaką część
+kosztu logowania stanowi hashowanie. Działa na tymczasowej bazie - nie dotyka db.sqlite3.
+
+    cd backend && python -m benchmarks.login_throughput --users 20 --logins 100 --threads 1 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+PASSWORD = 'bench-password-123'
+
+
+def setup_django(database_path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = database_path
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def create_users(count):
+    from django.contrib.auth.hashers import make_password
+
+    from api.models import CustomUser, Student
+
+    # Jeden hash dla wszystkich - przygotowanie danych nie jest mierzone
+    password = make_password(PASSWORD)
+    users = CustomUser.objects.bulk_create([
+        CustomUser(email=f'login{i}@bench.local', password=password, first_name='Bench', last_name=str(i))
+        for i in range(count)
+    ])
+    Student.objects.bulk_create([
+        Student(
+            user=user, first_name='Bench', last_name=str(i), email=user.email,
+            phone_number='000000000', date_of_birth='2000-01-01',
+        )
+        for i, user in enumerate(users)
+    ])
+    return [user.email for user in users]
+
+
+def measure_hashing(samples):
+    from django.contrib.auth.hashers import check_password, make_password
+
+    encoded = make_password(PASSWORD)
+    started = time.perf_counter()
+    for _ in range(samples):
+        check_password(PASSWORD, encoded)
+    return (time.perf_counter() - started) / samples
+
+
+def login_run(emails, logins, threads):
+    from asgiref.sync import async_to_sync
+    from django.db import connection, reset_queries
+    from rest_framework.test import APIRequestFactory
+
+    from api.views import CustomTokenObtainPairView
+
+    factory = APIRequestFactory()
+    # Widok logowania jest asynchroniczny - jak pod WSGI, każde żądanie we własnej pętli zdarzeń
+    view = async_to_sync(CustomTokenObtainPairView.as_view())
+    per_thread = logins // threads
+    failures = []
+    queries = []
+    lock = threading.Lock()
+
+    def client(offset):
+        local_queries = 0
+        for i in range(per_thread):
+            email = emails[(offset + i) % len(emails)]
+            request = factory.post('/api/auth/login/', {'email': email, 'password': PASSWORD}, format='json')
+            reset_queries()
+            response = view(request)
+            local_queries += len(connection.queries)
+            if response.status_code != 200:
+                failures.append(response.status_code)
+        connection.close()
+        with lock:
+            queries.append(local_queries)
+
+    workers = [threading.Thread(target=client, args=(n * per_thread,)) for n in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return elapsed, per_thread * threads, sum(queries), failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20, help="Distinct users to log in")
+    parser.add_argument('--logins', type=int, default=100, help="Logins per run")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8], help="Concurrent clients per run")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'bench.sqlite3'))
+        from django.conf import settings
+        from django.contrib.auth.hashers import get_hasher
+
+        # connection.queries jest zbierane tylko przy DEBUG
+        settings.DEBUG = True
+        emails = create_users(args.users)
+        hasher = get_hasher()
+        iterations = getattr(hasher, 'iterations', '-')
+        hash_time = measure_hashing(5)
+        print(f"hasher {hasher.algorithm} (iterations {iterations}), check_password {hash_time * 1000:.1f} ms")
+        print(f"{'threads':<9}{'time [s]':>10}{'logins/s':>10}{'queries/login':>15}{'hashing share':>15}")
+        for threads in args.threads:
+            elapsed, total, queries, failures = login_run(emails, args.logins, threads)
+            share = min(1.0, hash_time * total / (elapsed * threads))
+            failed = f"  failed: {len(failures)}" if failures else ''
+            print(
+                f"{threads:<9}{elapsed:>10.3f}{total / elapsed:>10.1f}{queries / total:>15.1f}"
+                f"{share:>14.0%}{failed}"
+            )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
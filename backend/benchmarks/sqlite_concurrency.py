@@ -0,0 +1,172 @@
+"""
+Benchmark: jednoczesne odczyty i zapisy na SQLite - profil bazowy vs produkcyjny.
+
+Profil bazowy to sqlite3 bez OPTIONS (rollback journal, połączenie na żądanie),
+produkcyjny to settings.SQLITE_PRAGMAS (WAL, synchronous=NORMAL, busy_timeout, mmap)
+z BEGIN IMMEDIATE i CONN_MAX_AGE. Każdy profil działa w osobnym procesie na własnym
+tymczasowym pliku - nie dotyka db.sqlite3.
+
+    cd backend && python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+PROFILES = ('baseline', 'production')
+
+
+def setup_django(database_path, profile):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    from django.conf import settings
+    database = settings.DATABASES['default']
+    database['NAME'] = database_path
+    if profile == 'baseline':
+        for key in ('OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS'):
+            database.pop(key, None)
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed(classes, bookings_per_class):
+    from django.utils import timezone
+
+    from api.models import Booking, Class, CustomUser, Instructor, Student
+
+    instructor = Instructor.objects.create(first_name='Bench', last_name='Bench', email='i@bench.local')
+    Class.objects.bulk_create([
+        Class(
+            name=f'Bench {i}', style='Salsa', max_participants=bookings_per_class * 2,
+            instructor=instructor, start_time=timezone.now(), room=f'S{i % 4}',
+        )
+        for i in range(classes)
+    ])
+    users = CustomUser.objects.bulk_create([
+        CustomUser(email=f's{i}@bench.local', password='!') for i in range(bookings_per_class)
+    ])
+    students = Student.objects.bulk_create([
+        Student(
+            user=user, first_name='Bench', last_name=str(i), email=user.email,
+            phone_number='000000000', date_of_birth='2000-01-01',
+        )
+        for i, user in enumerate(users)
+    ])
+    # bulk_create omija Booking.save(), więc liczniki miejsc nie są tu potrzebne
+    Booking.objects.bulk_create([
+        Booking(student=student, class_model=class_instance, status='confirmed')
+        for class_instance in Class.objects.all()
+        for student in students
+    ])
+
+
+def run(profile, readers, writers, seconds):
+    from django.db import OperationalError, connection, transaction
+    from django.db.models import Count, F
+
+    from api.models import Class
+
+    stop = threading.Event()
+    counts = Counter()
+    latencies = {'read': [], 'write': []}
+    lock = threading.Lock()
+    close_per_operation = profile == 'baseline'
+
+    def read():
+        list(
+            Class.objects
+            .annotate(total=Count('bookings'))
+            .values('id', 'name', 'room', 'total')
+        )
+
+    def write():
+        with transaction.atomic():
+            Class.objects.filter(room='S0').update(confirmed_count=F('confirmed_count') + 1)
+
+    def worker(kind, operation):
+        local = Counter()
+        timings = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                operation()
+                local[kind] += 1
+                timings.append(time.perf_counter() - started)
+            except OperationalError:
+                local[f'{kind}_locked'] += 1
+            finally:
+                # profil bazowy: bez CONN_MAX_AGE każde żądanie otwiera nowe połączenie
+                if close_per_operation:
+                    connection.close()
+        connection.close()
+        with lock:
+            counts.update(local)
+            latencies[kind].extend(timings)
+
+    threads = (
+        [threading.Thread(target=worker, args=('read', read)) for _ in range(readers)]
+        + [threading.Thread(target=worker, args=('write', write)) for _ in range(writers)]
+    )
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts, latencies
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8, help="Reader threads")
+    parser.add_argument('--writers', type=int, default=2, help="Writer threads")
+    parser.add_argument('--seconds', type=float, default=5, help="Duration of each run")
+    parser.add_argument('--classes', type=int, default=50, help="Seeded classes")
+    parser.add_argument('--bookings', type=int, default=20, help="Seeded bookings per class")
+    parser.add_argument('--profile', choices=PROFILES, help="Run a single profile (used internally)")
+    args = parser.parse_args(argv)
+
+    if args.profile is None:
+        # ustawienia Django konfiguruje się raz na proces - każdy profil w osobnym
+        print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+        print(
+            f"{'profile':<12}{'reads/s':>10}{'p95 read':>10}{'writes/s':>10}{'p95 write':>11}"
+            f"{'locked':>8}"
+        )
+        arguments = sys.argv[1:] if argv is None else argv
+        for profile in PROFILES:
+            subprocess.run(
+                [sys.executable, '-m', 'benchmarks.sqlite_concurrency', *arguments, '--profile', profile],
+                check=True,
+            )
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'bench.sqlite3'), args.profile)
+        seed(args.classes, args.bookings)
+        counts, latencies = run(args.profile, args.readers, args.writers, args.seconds)
+        locked = counts['read_locked'] + counts['write_locked']
+        print(
+            f"{args.profile:<12}{counts['read'] / args.seconds:>10.1f}"
+            f"{percentile(latencies['read'], 0.95):>8.1f}ms"
+            f"{counts['write'] / args.seconds:>10.1f}"
+            f"{percentile(latencies['write'], 0.95):>9.1f}ms{locked:>8}"
+        )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+import axios from 'axios';
+import { computed, ref } from 'vue';
+
+// Pobiera wszystkie strony listy stronicowanej kursorem ({ next, previous, results })
+export const fetchAllPages = async (url, config = {}) => {
+  const results = [];
+  let next = url;
+  while (next) {
+    const response = await axios.get(next, config);
+    results.push(...response.data.results);
+    next = response.data.next;
+  }
+  return results;
+};
+
+// Lista stronicowana kursorem wczytywana na żądanie: reload() pobiera pierwszą stronę,
+// loadMore() dopisuje kolejną. url i config mogą być funkcjami - np. z aktualnym tokenem.
+export const usePagedList = (url, config = {}) => {
+  const items = ref([]);
+  const next = ref(null);
+  const loading = ref(false);
+
+  const load = async (pageUrl, append) => {
+    loading.value = true;
+    try {
+      const response = await axios.get(pageUrl, typeof config === 'function' ? config() : config);
+      items.value = append ? [...items.value, ...response.data.results] : response.data.results;
+      next.value = response.data.next;
+    } finally {
+      loading.value = false;
+    }
+  };
+
+  return {
+    items,
+    loading,
+    hasMore: computed(() => Boolean(next.value)),
+    reload: () => load(typeof url === 'function' ? url() : url, false),
+    loadMore: () => (next.value && !loading.value ? load(next.value, true) : Promise.resolve()),
+  };
+};